@@ -1,47 +1,157 @@
-from typing import Optional
-from contextlib import suppress
+import atexit
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from threading import Lock
 
 """
 Cache module — provides a simple abstraction layer for Redis-based caching
-with automatic in-memory fallback.  
+with automatic in-memory fallback.
 Used for deduplication, rate limiting, and temporary state storage.
+Bulk helpers (`get_many`, `set_many`) cost one round trip per batch, and
+`set_if_absent` is an atomic claim (SET NX) for concurrent workers, and the
+compare-and-* helpers (WATCH/MULTI) let an owner renew or drop its claim.
+
+While Redis is unreachable, calls go to a bounded `LocalCache` (TTL + LRU,
+compact digest keys, optional snapshot file). Redis is re-probed at most every
+`reconnect_interval` seconds; on reconnect, dedup marks recorded locally in
+the meantime are copied to Redis (SET NX) so other workers see them.
 """
 try:
     import redis
 except Exception:
     redis = None
 
+from core.local_cache import LocalCache
 from observibility.logger import logger
+from observibility.metrics import inc
+
+_CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError) if redis else ()
 
 class Cache:
-    def __init__(self, url: str | None):
-        self._inmem = {}
-        self._r = None
-        if url and redis:
-            with suppress(Exception):
-                self._r = redis.Redis.from_url(url, decode_responses=True)
-                self._r.ping()
-                logger.info("redis_connected", url=url)
+    def __init__(self, url: str | None, client=None, max_entries: int = 200_000,
+                 snapshot_path: str | None = None, reconnect_interval: float = 5.0):
+        self.url = url
+        self.reconnect_interval = reconnect_interval
+        self._local = LocalCache(max_entries, snapshot_path)
+        self._lock = Lock()
+        self._r = client  # pre-built redis-compatible client (e.g. fakeredis in tests)
+        self._next_probe = 0.0
+        if snapshot_path:
+            atexit.register(self.persist)
+        self._redis()
+
+    def _redis(self):
+        """The live Redis client, (re)connecting at most every `reconnect_interval` seconds."""
+        if self._r is not None or not (self.url and redis) or time.monotonic() < self._next_probe:
+            return self._r
+        with self._lock:
+            if self._r is not None or time.monotonic() < self._next_probe:
+                return self._r
+            self._next_probe = time.monotonic() + self.reconnect_interval
+            try:
+                r = redis.Redis.from_url(self.url, decode_responses=True, socket_connect_timeout=1)
+                r.ping()
+            except Exception as e:
+                logger.warning("redis_unavailable", url=self.url, error=str(e))
+                return None
+            self._sync_local(r)
+            self._r = r
+            logger.info("redis_connected", url=self.url)
+            return r
+
+    def _sync_local(self, r):
+        marks = self._local.items("checksum:")
+        if not marks:
+            return
+        pipe = r.pipeline(transaction=False)
+        for key, value in marks:
+            pipe.set(key, value, nx=True)
+        pipe.execute()
+
+    def _call(self, remote: Callable[[Any], Any], local: Callable[[LocalCache], Any]):
+        r = self._redis()
+        if r is not None:
+            try:
+                return remote(r)
+            except _CONNECTION_ERRORS as e:
+                with self._lock:
+                    if self._r is r:
+                        self._r = None
+                        self._next_probe = time.monotonic() + self.reconnect_interval
+                inc("redis_fallback_total")
+                logger.warning("redis_lost", error=str(e))
+        return local(self._local)
 
     def get(self, key: str) -> Optional[str]:
-        if self._r:
-            return self._r.get(key)
-        return self._inmem.get(key)
+        return self._call(lambda r: r.get(key), lambda l: l.get(key))
 
     def set(self, key: str, value: str, ex: int | None = None):
-        if self._r:
-            self._r.set(key, value, ex=ex)
-        else:
-            self._inmem[key] = value
+        self._call(lambda r: r.set(key, value, ex=ex), lambda l: l.set(key, value, ex))
+
+    def get_many(self, keys: Iterable[str]) -> List[Optional[str]]:
+        keys = list(keys)
+        if not keys:
+            return []
+        return self._call(lambda r: r.mget(keys), lambda l: l.get_many(keys))
+
+    def set_many(self, mapping: Dict[str, str], ex: int | None = None):
+        if not mapping:
+            return
+        def remote(r):
+            pipe = r.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ex)
+            pipe.execute()
+        self._call(remote, lambda l: l.set_many(mapping, ex))
 
-    def incr(self, key: str, n: int = 1):
-        if self._r:
-            return self._r.incrby(key, n)
-        self._inmem[key] = int(self._inmem.get(key, 0)) + n
-        return self._inmem[key]
+    def set_if_absent(self, key: str, value: str, ex: int | None = None) -> bool:
+        return self._call(lambda r: bool(r.set(key, value, ex=ex, nx=True)),
+                          lambda l: l.set_if_absent(key, value, ex))
+
+    def compare_and_delete(self, key: str, expected: str) -> bool:
+        """Deletes `key` only while it still holds `expected` (e.g. our own lease)."""
+        return self._call(lambda r: _watched(r, key, expected, lambda pipe: pipe.delete(key)),
+                          lambda l: l.compare_and_delete(key, expected))
+
+    def compare_and_expire(self, key: str, expected: str, ex: int) -> bool:
+        """Refreshes the TTL of `key` only while it still holds `expected`."""
+        return self._call(lambda r: _watched(r, key, expected, lambda pipe: pipe.expire(key, ex)),
+                          lambda l: l.compare_and_expire(key, expected, ex))
+
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        self._call(lambda r: r.delete(*keys), lambda l: l.delete(*keys))
+
+    def incr(self, key: str, n: int = 1, ex: int | None = None):
+        def remote(r):
+            if ex is None:
+                return r.incrby(key, n)
+            pipe = r.pipeline()  # MULTI/EXEC: counter and its TTL land together
+            pipe.incrby(key, n)
+            pipe.expire(key, ex)
+            return pipe.execute()[0]
+        return self._call(remote, lambda l: l.incr(key, n, ex))
 
     def flush(self):
-        if self._r:
-            self._r.flushdb()
-        else:
-            self._inmem.clear()
+        r = self._redis()
+        if r is not None:
+            r.flushdb()
+        self._local.flush()
+
+    def persist(self):
+        """Writes the local fallback's snapshot (no-op without `snapshot_path`)."""
+        self._local.save()
+
+def _watched(r, key: str, expected: str, op) -> bool:
+    with r.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            if pipe.get(key) != expected:
+                return False
+            pipe.multi()
+            op(pipe)
+            pipe.execute()
+            return True
+        except redis.WatchError:
+            return False
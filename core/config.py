@@ -7,8 +7,35 @@ failure simulation rate for the orchestration pipeline.
 """
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_RECONNECT_INTERVAL = float(os.getenv("REDIS_RECONNECT_INTERVAL", "5"))  # seconds between probes while down
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "200000"))  # fallback cache bound (LRU)
+LOCAL_CACHE_SNAPSHOT = os.getenv("LOCAL_CACHE_SNAPSHOT", "data/.local_cache.json")  # empty disables
+EMPLOYEES_PATH = os.getenv("EMPLOYEES_PATH", "data/employees.json")  # .json or .ndjson
 ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "../data/archive")
+ARCHIVE_MODE = os.getenv("ARCHIVE_MODE", "copy")  # copy | link | aesgcm
+ARCHIVE_KEY = os.getenv("ARCHIVE_KEY", "")  # 64 hex chars, required for aesgcm
+# empty string disables the persistent checksum index
+CHECKSUM_INDEX_PATH = os.getenv("CHECKSUM_INDEX_PATH", os.path.join(ARCHIVE_DIR, ".checksum_index.sqlite"))
 MAX_QPS_PER_EMPLOYEE = float(os.getenv("MAX_QPS_PER_EMPLOYEE", "3"))
+MAX_QPS_GLOBAL = float(os.getenv("MAX_QPS_GLOBAL", "0"))  # 0 = unlimited
 RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
 RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10"))
+DEDUP_CLAIM_TTL = int(os.getenv("DEDUP_CLAIM_TTL", "300"))
+LEASE_TTL = int(os.getenv("LEASE_TTL", "30"))  # seconds; heartbeat renews every LEASE_TTL / 3
 FAIL_RATE = float(os.getenv("FAIL_RATE", "0.0"))
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "1"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+STAGE_WORKERS = os.getenv("STAGE_WORKERS", "")  # e.g. "hash=2,upload=16"; unset stages: hash/dedup 1, upload/archive MAX_WORKERS
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "500"))
+LISTENER_CHECKPOINT = os.getenv("LISTENER_CHECKPOINT", "data/.listener_checkpoint.json")
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "5"))
+HIBOB_BASE_URL = os.getenv("HIBOB_BASE_URL", "")  # empty: use the in-process mock
+HIBOB_TOKEN = os.getenv("HIBOB_TOKEN", "")
+HIBOB_POOL_SIZE = int(os.getenv("HIBOB_POOL_SIZE", "10"))
+HIBOB_BATCH_SIZE = int(os.getenv("HIBOB_BATCH_SIZE", "50"))
+UPLOAD_BATCH_THRESHOLD = int(os.getenv("UPLOAD_BATCH_THRESHOLD", "100"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = no /metrics endpoint
+METRICS_FILE = os.getenv("METRICS_FILE", "")  # Prometheus textfile written after each run
+NOTIFY_WINDOW = float(os.getenv("NOTIFY_WINDOW", "30"))  # seconds per notification summary
+RUN_JOURNAL_PATH = os.getenv("RUN_JOURNAL_PATH", "data/.run_journal.jsonl")  # empty disables
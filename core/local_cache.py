@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Tuple
+
+"""
+Local cache used by `Cache` while Redis is unavailable.
+
+- Bounded: at most `max_entries` keys; the least recently used key is
+  evicted first.
+- TTL: `ex` is honoured like in Redis; expired keys are dropped on access
+  and whenever a snapshot is written.
+- Compact keys: "checksum:<64 hex>" is stored as the raw 32-byte digest and
+  "inflight:<64 hex>" as b"i" + digest, so the dedup set costs 32–33 bytes
+  per key instead of a 73-character string.
+- Snapshots: `save()` / `load()` persist live entries (with their absolute
+  expiry) as JSON, so dedup state survives a restart without Redis.
+"""
+
+_DIGEST_PREFIXES = {"checksum:": b"", "inflight:": b"i"}
+_DIGEST_TAGS = {tag: prefix for prefix, tag in _DIGEST_PREFIXES.items()}
+
+def compact_key(key: str) -> str | bytes:
+    for prefix, tag in _DIGEST_PREFIXES.items():
+        if key.startswith(prefix) and len(key) == len(prefix) + 64:
+            try:
+                return tag + bytes.fromhex(key[len(prefix):])
+            except ValueError:
+                return key
+    return key
+
+def expand_key(key: str | bytes) -> str:
+    if isinstance(key, str):
+        return key
+    return f"{_DIGEST_TAGS[key[:-32]]}{key[-32:].hex()}"
+
+
+class LocalCache:
+    def __init__(self, max_entries: int = 200_000, snapshot_path: str | None = None):
+        self.max_entries = max(1, max_entries)
+        self.snapshot_path = snapshot_path
+        self._data: OrderedDict = OrderedDict()  # compact key -> (value, expires_at or None)
+        self._lock = Lock()
+        if snapshot_path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            return self._get(compact_key(key))
+
+    def get_many(self, keys: Iterable[str]) -> List[Any]:
+        with self._lock:
+            return [self._get(compact_key(k)) for k in keys]
+
+    def set(self, key: str, value: Any, ex: float | None = None):
+        with self._lock:
+            self._put(compact_key(key), value, ex)
+
+    def set_many(self, mapping: Dict[str, Any], ex: float | None = None):
+        with self._lock:
+            for key, value in mapping.items():
+                self._put(compact_key(key), value, ex)
+
+    def set_if_absent(self, key: str, value: Any, ex: float | None = None) -> bool:
+        k = compact_key(key)
+        with self._lock:
+            if self._get(k) is not None:
+                return False
+            self._put(k, value, ex)
+            return True
+
+    def compare_and_delete(self, key: str, expected: Any) -> bool:
+        k = compact_key(key)
+        with self._lock:
+            if self._get(k) != expected:
+                return False
+            del self._data[k]
+            return True
+
+    def compare_and_expire(self, key: str, expected: Any, ex: float) -> bool:
+        k = compact_key(key)
+        with self._lock:
+            if self._get(k) != expected:
+                return False
+            self._put(k, expected, ex)
+            return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._data.pop(compact_key(key), None)
+
+    def incr(self, key: str, n: int = 1, ex: float | None = None) -> int:
+        k = compact_key(key)
+        with self._lock:
+            value = int(self._get(k) or 0) + n
+            if ex is None and k in self._data:
+                self._store(k, value, self._data[k][1])  # INCRBY keeps the existing TTL
+            else:
+                self._put(k, value, ex)
+            return value
+
+    def flush(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self, prefix: str = "") -> List[Tuple[str, Any]]:
+        """Live (key, value) pairs whose expanded key starts with `prefix`."""
+        now = time.time()
+        with self._lock:
+            entries = list(self._data.items())
+        return [(expand_key(k), v) for k, (v, exp) in entries
+                if (exp is None or exp > now) and expand_key(k).startswith(prefix)]
+
+    def save(self, path: str | None = None):
+        path = path or self.snapshot_path
+        if not path:
+            return
+        now = time.time()
+        with self._lock:
+            for k in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[k]
+            entries = [[expand_key(k), v, exp] for k, (v, exp) in self._data.items()]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "entries": entries}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def load(self, path: str | None = None):
+        path = path or self.snapshot_path
+        try:
+            with open(path) as f:
+                entries = json.load(f)["entries"]
+        except (OSError, ValueError, KeyError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, value, exp in entries:  # saved least recently used first
+                if exp is None or exp > now:
+                    self._store(compact_key(key), value, exp)
+
+    def _get(self, k: str | bytes) -> Any:
+        entry = self._data.get(k)
+        if entry is None:
+            return None
+        value, exp = entry
+        if exp is not None and exp <= time.time():
+            del self._data[k]
+            return None
+        self._data.move_to_end(k)
+        return value
+
+    def _put(self, k: str | bytes, value: Any, ex: float | None):
+        self._store(k, value, time.time() + ex if ex else None)
+
+    def _store(self, k: str | bytes, value: Any, expires_at: float | None):
+        self._data[k] = (value, expires_at)
+        self._data.move_to_end(k)
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
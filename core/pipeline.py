@@ -0,0 +1,119 @@
+import time
+from queue import Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List
+from observibility.logger import logger
+from observibility.metrics import set_gauge
+
+"""
+Staged pipeline with bounded queues between stages.
+
+Each `Stage` runs `workers` threads that take items from the stage's input
+queue (at most `queue_size` items) and call `fn(item)`, which yields zero or
+more items for the next stage. A full queue blocks the stage feeding it, so
+a slow stage (e.g. upload) throttles everything upstream instead of letting
+work pile up in memory, while CPU-, disk- and network-bound stages overlap.
+
+Per stage, two gauges are kept current:
+- `pipeline_queue_depth{stage}` — items waiting in the stage's input queue.
+- `pipeline_stage_utilisation{stage}` — busy time / (workers × elapsed), 0–1.
+
+Every item is processed even after a stage fails (downstream work may hold
+claims others wait on); the first exception is re-raised by `run()`.
+"""
+
+_DONE = object()
+
+def parse_stage_workers(spec: str) -> Dict[str, int]:
+    """Parses "hash=2,upload=16" into {"hash": 2, "upload": 16}."""
+    workers = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, n = item.partition("=")
+        workers[name.strip()] = int(n)
+    return workers
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Iterable[Any] | None], workers: int = 1, queue_size: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue = Queue(maxsize=max(1, queue_size))
+        self._busy = 0.0
+        self._left = self.workers
+        self._lock = Lock()
+
+    def put(self, item: Any):
+        self.queue.put(item)
+        set_gauge("pipeline_queue_depth", self.queue.qsize(), stage=self.name)
+
+    def get(self) -> Any:
+        item = self.queue.get()
+        set_gauge("pipeline_queue_depth", self.queue.qsize(), stage=self.name)
+        return item
+
+    def account(self, busy: float, started: float):
+        with self._lock:
+            self._busy += busy
+            total = self._busy
+        elapsed = time.perf_counter() - started
+        if elapsed > 0:
+            set_gauge("pipeline_stage_utilisation", min(1.0, total / (self.workers * elapsed)), stage=self.name)
+
+    def worker_done(self) -> bool:
+        """True for the last worker of this stage to finish."""
+        with self._lock:
+            self._left -= 1
+            return self._left == 0
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._error: BaseException | None = None
+        self._error_lock = Lock()
+
+    def run(self, source: Iterable[Any]):
+        """Feeds `source` into the first stage from the calling thread and waits for all stages to drain."""
+        self._started = time.perf_counter()
+        threads = [Thread(target=self._work, args=(i,), name=f"stage-{stage.name}-{n}", daemon=True)
+                   for i, stage in enumerate(self.stages) for n in range(stage.workers)]
+        for t in threads:
+            t.start()
+        first = self.stages[0]
+        try:
+            for item in source:
+                first.put(item)
+        except BaseException as e:
+            self._fail(e, "discovery")
+        finally:
+            for _ in range(first.workers):
+                first.put(_DONE)
+            for t in threads:
+                t.join()
+        if self._error is not None:
+            raise self._error
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        nxt = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while (item := stage.get()) is not _DONE:
+            start = time.perf_counter()
+            try:
+                for out in stage.fn(item) or ():
+                    if nxt is not None:
+                        busy = time.perf_counter() - start
+                        nxt.put(out)  # blocking here is backpressure, not work
+                        start = time.perf_counter() - busy
+            except BaseException as e:
+                self._fail(e, stage.name)
+            stage.account(time.perf_counter() - start, self._started)
+        if stage.worker_done() and nxt is not None:
+            for _ in range(nxt.workers):
+                nxt.put(_DONE)
+
+    def _fail(self, e: BaseException, stage: str):
+        logger.error("pipeline_stage_failed", stage=stage, error=str(e))
+        with self._error_lock:
+            if self._error is None:
+                self._error = e
@@ -0,0 +1,99 @@
+import math
+import time
+from typing import List, Tuple
+from core.cache import Cache
+
+"""
+Rate limiting on top of `Cache.incr` — works against Redis (INCRBY + EXPIRE in
+one MULTI/EXEC, shared by every worker) and the in-memory fallback.
+
+`RateLimiter` is a sliding-window counter: the previous fixed window's count
+is weighted by how much of it still overlaps the sliding window, so bursts at
+window edges stay within `rate`. `UploadThrottle` combines a global and a
+per-employee limiter for HiBob uploads.
+"""
+
+class RateLimiter:
+    def __init__(self, cache: Cache, rate: float, window: float = 1.0, prefix: str = "rl"):
+        if rate <= 0:
+            raise ValueError("rate must be > 0 (UploadThrottle treats 0 as unlimited)")
+        self.cache = cache
+        self.window = max(window, 1 / rate)  # at least one request per window
+        self.limit = rate * self.window
+        self.prefix = prefix
+        self._ttl = max(1, math.ceil(self.window * 2))  # the previous window is still read
+
+    def try_acquire(self, key: str = "global", now: float | None = None) -> float:
+        """Takes one slot for `key`. Returns 0 if admitted, else seconds to wait before retrying."""
+        now = time.time() if now is None else now
+        idx = int(now // self.window)
+        current = int(self.cache.incr(self._key(key, idx), 1, ex=self._ttl))
+        previous = int(self.cache.get(self._key(key, idx - 1)) or 0)
+        overlap = 1 - (now % self.window) / self.window
+        if previous * overlap + current <= self.limit:
+            return 0.0
+        self.cache.incr(self._key(key, idx), -1, ex=self._ttl)
+        # wait until enough of the previous window has slid out, or the next window starts
+        excess = previous * overlap + current - self.limit
+        until_next = self.window - (now % self.window)
+        if previous:
+            return min(until_next, excess / previous * self.window)
+        return until_next
+
+    def release(self, key: str = "global", now: float | None = None):
+        """Gives back a slot taken by `try_acquire` (e.g. when a second limiter rejected)."""
+        now = time.time() if now is None else now
+        self.cache.incr(self._key(key, int(now // self.window)), -1, ex=self._ttl)
+
+    def acquire(self, key: str = "global", timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while (wait := self.try_acquire(key)) > 0:
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+        return True
+
+    def _key(self, key: str, idx: int) -> str:
+        return f"{self.prefix}:{key}:{idx}"
+
+
+class UploadThrottle:
+    """Global + per-employee upload QPS. A rate of 0 disables that limit."""
+
+    def __init__(self, cache: Cache, global_qps: float, per_employee_qps: float):
+        self.global_limiter = RateLimiter(cache, global_qps, prefix="rl:upload") if global_qps > 0 else None
+        self.employee_limiter = RateLimiter(cache, per_employee_qps, prefix="rl:emp") if per_employee_qps > 0 else None
+
+    def try_acquire(self, hibob_id: str | None = None) -> float:
+        """Returns 0 if an upload for `hibob_id` may go out now, else seconds to wait."""
+        now = time.time()
+        if self.employee_limiter and hibob_id is not None:
+            wait = self.employee_limiter.try_acquire(hibob_id, now)
+            if wait:
+                return wait
+        if self.global_limiter:
+            wait = self.global_limiter.try_acquire("global", now)
+            if wait:
+                if self.employee_limiter and hibob_id is not None:
+                    self.employee_limiter.release(hibob_id, now)
+                return wait
+        return 0.0
+
+    def try_acquire_batch(self, hibob_ids: List[str]) -> Tuple[List[int], float]:
+        """
+        Admission for one request carrying several payslips: each employee needs
+        a slot, the request needs one global slot. Returns (admitted indices,
+        wait); a non-zero wait means the request must be deferred as a whole.
+        """
+        now = time.time()
+        admitted = list(range(len(hibob_ids)))
+        if self.employee_limiter:
+            admitted = [i for i in admitted if not self.employee_limiter.try_acquire(hibob_ids[i], now)]
+        if admitted and self.global_limiter:
+            wait = self.global_limiter.try_acquire("global", now)
+            if wait:
+                if self.employee_limiter:
+                    for i in admitted:
+                        self.employee_limiter.release(hibob_ids[i], now)
+                return [], wait
+        return admitted, 0.0
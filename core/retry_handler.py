@@ -1,20 +1,166 @@
+import asyncio
+import heapq
+import itertools
+import random
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Thread
 from observibility.logger import logger
+from core import config
 
 """
-Retry utility — executes a function with exponential backoff.
+Retry utilities — execute a function with capped, fully jittered exponential backoff.
 Used to handle transient failures (e.g., network or API errors)
 by retrying a fixed number of times before raising the exception.
+
+- `retry()` / `retry_async()` retry inline (blocking sleep / asyncio.sleep).
+- `RetryScheduler` parks failed attempts in a delay queue so the calling
+  worker is free to move on; the returned Future resolves once the call
+  succeeds or runs out of attempts and carries per-attempt latencies.
+- Raising `RetryAfter` (rate limited / HTTP 429) defers the call by the given
+  delay without using up an attempt.
 """
 
+class RetryAfter(Exception):
+    def __init__(self, delay: float, message: str = "rate limited"):
+        super().__init__(message)
+        self.delay = delay
+
+MAX_DEFERRALS = 1000  # RetryAfter deferrals allowed per call before giving up
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float | None = None) -> float:
+    ceiling = base_delay * (2 ** (attempt - 1))
+    if max_delay is not None:
+        ceiling = min(ceiling, max_delay)
+    return random.uniform(0, ceiling)
+
 def retry(fn, attempts: int, base_delay: float, *args, **kwargs):
     last = None
-    for i in range(1, attempts + 1):
+    i, deferrals = 1, 0
+    while i <= attempts:
         try:
             return fn(*args, **kwargs)
+        except RetryAfter as e:
+            if deferrals >= MAX_DEFERRALS:
+                raise
+            deferrals += 1
+            time.sleep(e.delay)
+            continue
         except Exception as e:
             last = e
             logger.warning("retry_attempt", attempt=i, error=str(e))
-            time.sleep(base_delay * (2 ** (i - 1)))
+            if i < attempts:
+                time.sleep(backoff_delay(i, base_delay, config.RETRY_MAX_DELAY))
+            i += 1
     if last:
         raise last
+
+async def retry_async(fn, attempts: int, base_delay: float, *args, **kwargs):
+    last = None
+    i, deferrals = 1, 0
+    while i <= attempts:
+        try:
+            res = fn(*args, **kwargs)
+            if asyncio.iscoroutine(res):
+                res = await res
+            return res
+        except RetryAfter as e:
+            if deferrals >= MAX_DEFERRALS:
+                raise
+            deferrals += 1
+            await asyncio.sleep(e.delay)
+            continue
+        except Exception as e:
+            last = e
+            logger.warning("retry_attempt", attempt=i, error=str(e))
+            if i < attempts:
+                await asyncio.sleep(backoff_delay(i, base_delay, config.RETRY_MAX_DELAY))
+            i += 1
+    if last:
+        raise last
+
+
+class _RetryJob:
+    __slots__ = ("fn", "future", "attempt", "deferrals")
+
+    def __init__(self, fn, future: Future):
+        self.fn = fn
+        self.future = future
+        self.attempt = 0
+        self.deferrals = 0
+
+
+class RetryScheduler:
+    def __init__(self, attempts: int, base_delay: float, max_delay: float | None = None,
+                 workers: int = 1, executor: ThreadPoolExecutor | None = None):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._executor = executor or ThreadPoolExecutor(max_workers=max(1, workers),
+                                                        thread_name_prefix="retry")
+        self._delayed = []  # heap of (due, seq, job)
+        self._seq = itertools.count()
+        self._cond = Condition()
+        self._timer = None
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Runs `fn` on the worker pool; failures are re-queued after a jittered delay."""
+        future = Future()
+        future.attempts = []  # [{"attempt", "latency_ms", "error"}]
+        job = _RetryJob(lambda: fn(*args, **kwargs), future)
+        self._executor.submit(self._attempt, job)
+        return future
+
+    def submit_async(self, fn, *args, **kwargs) -> asyncio.Future:
+        return asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._delayed)
+
+    def _attempt(self, job: _RetryJob):
+        job.attempt += 1
+        start = time.perf_counter()
+        try:
+            res = job.fn()
+        except RetryAfter as e:
+            job.attempt -= 1
+            job.deferrals += 1
+            if job.deferrals > MAX_DEFERRALS:
+                job.future.set_exception(e)
+            else:
+                self._park(job, e.delay)
+            return
+        except Exception as e:
+            latency_ms = round((time.perf_counter() - start) * 1000, 3)
+            job.future.attempts.append({"attempt": job.attempt, "latency_ms": latency_ms, "error": str(e)})
+            logger.warning("retry_attempt", attempt=job.attempt, error=str(e), latency_ms=latency_ms)
+            if job.attempt >= self.attempts:
+                job.future.set_exception(e)
+            else:
+                self._park(job, backoff_delay(job.attempt, self.base_delay, self.max_delay))
+            return
+        latency_ms = round((time.perf_counter() - start) * 1000, 3)
+        job.future.attempts.append({"attempt": job.attempt, "latency_ms": latency_ms, "error": None})
+        job.future.set_result(res)
+
+    def _park(self, job: _RetryJob, delay: float):
+        with self._cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), job))
+            if self._timer is None:
+                self._timer = Thread(target=self._dispatch_loop, name="retry-timer", daemon=True)
+                self._timer.start()
+            self._cond.notify()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._delayed:
+                    self._cond.wait()
+                due, _, job = self._delayed[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._delayed)
+            self._executor.submit(self._attempt, job)
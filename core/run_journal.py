@@ -0,0 +1,127 @@
+import json
+import os
+import time
+from threading import Lock
+from typing import Dict, Iterable, List
+
+"""
+Run journal — crash-safe, append-only write-ahead log of per-file state
+transitions (hashed → uploaded → archived, or failed / skipped).
+
+Lines are JSON objects appended to one file; fsync is batched (every
+`fsync_every` records or `fsync_interval` seconds) except for records written
+with `durable=True` (used for "uploaded", so a completed upload is never
+repeated after a crash). `replay()` folds the log into the last known state
+per file and tolerates a torn final line.
+
+A full folder scan also records the folder (`begin()`), so a crash before
+most files were even discovered still leaves `resume` something to finish.
+After a run, `reset()` compacts the journal down to what is still unfinished:
+files that never reached a final state and folders whose scan did not complete.
+"""
+
+FINAL_STATES = ("archived", "failed", "skipped")
+
+class RunJournal:
+    def __init__(self, path: str, fsync_every: int = 64, fsync_interval: float = 1.0):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = Lock()
+        self._f = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def record(self, file_path: str, state: str, durable: bool = False, **fields):
+        line = json.dumps({"file": file_path, "state": state, "ts": time.time(), **fields})
+        with self._lock:
+            self._f.write(line + "\n")
+            self._unsynced += 1
+            if (durable or self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def begin(self, folder: str):
+        """Records that a scan of `folder` started; `reset(finished=[folder])` drops it again."""
+        line = json.dumps({"run": folder, "ts": time.time()})
+        with self._lock:
+            self._f.write(line + "\n")
+            self._sync()
+
+    def flush(self):
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def reset(self, finished: Iterable[str] = ()):
+        """
+        Drops files that reached a final state and the run records of the
+        `finished` folders; unfinished files (with their fields) and folders
+        are kept, compacted to one line each.
+        """
+        finished = set(finished)
+        with self._lock:
+            self._f.flush()
+            runs = [r for r in RunJournal.runs(self.path) if r not in finished]
+            todo = RunJournal.unfinished(self.path)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for folder in runs:
+                    f.write(json.dumps({"run": folder, "ts": time.time()}) + "\n")
+                for state in todo.values():
+                    f.write(json.dumps(state) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._f.close()
+            os.replace(tmp, self.path)
+            self._f = open(self.path, "a", encoding="utf-8")
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+    def _sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def replay(path: str) -> Dict[str, dict]:
+        """Last recorded state per file (with the fields recorded along the way)."""
+        state: Dict[str, dict] = {}
+        if not os.path.exists(path):
+            return state
+        with open(path, "r", encoding="utf-8") as f:
+            for raw in f:
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    break  # torn write at the tail from a crash
+                if "file" in rec:
+                    state.setdefault(rec["file"], {}).update(rec)
+        return state
+
+    @staticmethod
+    def runs(path: str) -> List[str]:
+        """Folders whose scan was started (`begin`) and not yet reset as finished."""
+        runs: Dict[str, None] = {}
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            for raw in f:
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    break
+                if "run" in rec:
+                    runs[rec["run"]] = None
+        return list(runs)
+
+    @staticmethod
+    def unfinished(path: str) -> Dict[str, dict]:
+        return {f: s for f, s in RunJournal.replay(path).items() if s["state"] not in FINAL_STATES}
@@ -0,0 +1,98 @@
+import os
+import platform
+import zlib
+from threading import Event, Lock, Thread
+from typing import List
+from core.cache import Cache
+from observibility.logger import logger
+from observibility.metrics import inc
+
+"""
+Work leasing for multi-node runs — several workers share one SFTP drop
+through Redis (via `Cache`).
+
+- A lease is `lease:<item>` = worker_id, taken with SET NX EX `ttl`.
+- A heartbeat thread renews this worker's leases every `ttl / 3` seconds
+  (compare-and-expire, so a lease that was lost is never re-extended).
+- Leases of a crashed worker simply expire; any other worker may then take
+  (steal) the item.
+- `shard_of()` gives each worker a preferred slice of the folder so workers
+  rarely contend; other shards are visited afterwards to pick up leftovers.
+"""
+
+def shard_of(item: str, shards: int) -> int:
+    return zlib.crc32(item.encode()) % shards
+
+def default_worker_id() -> str:
+    return f"{platform.node()}:{os.getpid()}"
+
+
+class LeaseManager:
+    def __init__(self, cache: Cache, worker_id: str | None = None, ttl: int = 30, prefix: str = "lease"):
+        self.cache = cache
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self.prefix = prefix
+        self._held = set()
+        self._lock = Lock()
+        self._stop = Event()
+        self._heartbeat = None
+
+    def try_acquire(self, item: str) -> bool:
+        if not self.cache.set_if_absent(self._key(item), self.worker_id, ex=self.ttl):
+            return False
+        with self._lock:
+            self._held.add(item)
+        inc("lease_acquired_total")
+        return True
+
+    def release(self, item: str):
+        with self._lock:
+            self._held.discard(item)
+        self.cache.compare_and_delete(self._key(item), self.worker_id)
+
+    def release_all(self):
+        with self._lock:
+            items, self._held = list(self._held), set()
+        for item in items:
+            self.cache.compare_and_delete(self._key(item), self.worker_id)
+
+    def held(self) -> List[str]:
+        with self._lock:
+            return list(self._held)
+
+    def renew(self):
+        """Extends every held lease; leases that expired and were taken over are dropped."""
+        for item in self.held():
+            if not self.cache.compare_and_expire(self._key(item), self.worker_id, self.ttl):
+                with self._lock:
+                    self._held.discard(item)
+                inc("lease_lost_total")
+                logger.warning("lease_lost", item=item, worker=self.worker_id)
+
+    def start(self):
+        if self._heartbeat is None:
+            self._stop.clear()
+            self._heartbeat = Thread(target=self._beat, name="lease-heartbeat", daemon=True)
+            self._heartbeat.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        self.release_all()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _beat(self):
+        while not self._stop.wait(self.ttl / 3):
+            self.renew()
+
+    def _key(self, item: str) -> str:
+        return f"{self.prefix}:{item}"
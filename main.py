@@ -1,11 +1,10 @@
-import json, os
+import os
 import click
-from core.cache import Cache
-from orchestrator import Orchestrator
-from observibility.logger import logger
-from dotenv import load_dotenv
-from core import config
-from middleware.sftp_listener import list_payslips
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.cache import Cache
+    from orchestrator import Orchestrator
 
 """
 Command-line entrypoint for the Payslip Automation system.
@@ -14,41 +13,185 @@ and processes all payslips in a specified folder.
 
 Usage:
   python main.py run --input data/payslips --fail-rate 0.3
+  python main.py run --input data/payslips --watch
+  python main.py run --input /mnt/sftp/payslips --distributed --shard 0 --shards 3
+  python main.py resume
+  python main.py serve --input data/payslips --interval 60
 
 Options:
   --input/-i     Folder containing payslip PDFs.
   --fail-rate    Override simulated upload failure rate (0–1).
+  --workers/-w   Number of files processed concurrently (default: MAX_WORKERS).
+  --watch        Keep polling and process only new/changed files (checkpointed).
+  --distributed  Share the folder with other nodes via Redis leases
+                 (--worker-id, --shard/--shards pick this node's preferred slice).
+
+`resume` replays the run journal (RUN_JOURNAL_PATH) and finishes what an
+interrupted run left unfinished: journalled files, plus a rescan of the folder
+it was scanning. `run` and `serve` do the same first when they find such a run.
+
+`serve` is a long-lived daemon: the Redis connection, employee index and HTTP
+pools are built once and stay warm. It polls every --interval seconds, and
+`kill -USR1 <pid>` starts a poll immediately; SIGTERM/SIGINT finish the
+current batch and exit. A poll that fails is logged and retried on the next
+poll instead of ending the daemon.
+
+Importing this module does no work: .env is loaded, and config, logging and
+the pipeline modules are imported, only when a command runs.
 """
 
-load_dotenv(override=True)
+def load_employees(path=None):
+    from core import config
+    from middleware.employee_directory import EmployeeDirectory
+    return EmployeeDirectory(path or config.EMPLOYEES_PATH)
 
-def load_employees(path="data/employees.json"):
-    with open(path, "r") as f:
-        return json.load(f)
+def make_cache() -> "Cache":
+    from core import config
+    from core.cache import Cache
+    return Cache(os.getenv("REDIS_URL", config.REDIS_URL), max_entries=config.LOCAL_CACHE_MAX_ENTRIES,
+                 snapshot_path=config.LOCAL_CACHE_SNAPSHOT or None,
+                 reconnect_interval=config.REDIS_RECONNECT_INTERVAL)
+
+def make_client(fail_rate: float):
+    from core import config
+    if not config.HIBOB_BASE_URL:
+        from middleware.hibob_api_mock import MockHiBobClient
+        return MockHiBobClient(fail_rate, batch_size=config.HIBOB_BATCH_SIZE)
+    from middleware.hibob_client import HiBobClient
+    return HiBobClient(config.HIBOB_BASE_URL, token=config.HIBOB_TOKEN or None,
+                       pool_size=config.HIBOB_POOL_SIZE, batch_size=config.HIBOB_BATCH_SIZE)
+
+def export_metrics():
+    from core import config
+    from observibility import metrics
+    if config.METRICS_FILE:
+        metrics.write_prometheus(config.METRICS_FILE)
+
+def serve_metrics():
+    from core import config
+    from observibility import metrics
+    if config.METRICS_PORT:
+        metrics.serve_http(config.METRICS_PORT)
 
 @click.group()
 def cli():
-    pass
+    from dotenv import load_dotenv
+    load_dotenv(override=True)  # before anything reads config or sets up logging
 
 @cli.command()
 @click.option("--input", "-i", default="data/payslips", help="Folder containing payslips")
 @click.option("--fail-rate", type=float, default=None, help="Override failure rate [0..1]")
-def run(input, fail_rate):
+@click.option("--workers", "-w", type=int, default=None, help="Concurrent file workers")
+@click.option("--watch", is_flag=True, help="Poll for new or changed files until interrupted")
+@click.option("--distributed", is_flag=True, help="Lease files through Redis to share the folder with other nodes")
+@click.option("--worker-id", default=None, help="Lease owner id (default: host:pid)")
+@click.option("--shard", type=int, default=0, help="Preferred shard of this node")
+@click.option("--shards", type=int, default=1, help="Total number of shards")
+def run(input, fail_rate, workers, watch, distributed, worker_id, shard, shards):
+    from core import config
+    orch = build_orchestrator(fail_rate, workers)
+    serve_metrics()
+    orch.resume_pending()
+    if distributed:
+        from core.work_lease import LeaseManager
+        if not 0 <= shard < shards:
+            raise click.BadParameter("--shard must be in [0, --shards)")
+        leases = LeaseManager(orch.cache, worker_id=worker_id, ttl=config.LEASE_TTL)
+        orch.run_distributed(input, leases, shard_index=shard, shard_count=shards)
+        export_metrics()
+        return
+    if not watch:
+        orch.run_folder(input)
+        export_metrics()
+        return
+    from middleware.sftp_listener import Checkpoint, poll_payslips
+    from observibility.logger import logger
+    logger.info("watch_started", folder=input, interval=config.POLL_INTERVAL)
+    checkpoint = Checkpoint(config.LISTENER_CHECKPOINT)
+    for new_files in poll_payslips(input, checkpoint, interval=config.POLL_INTERVAL):
+        checkpoint.retry_later(orch.run_folder(input, files=new_files))
+        export_metrics()
+
+@cli.command()
+@click.option("--fail-rate", type=float, default=None, help="Override failure rate [0..1]")
+@click.option("--workers", "-w", type=int, default=None, help="Concurrent file workers")
+def resume(fail_rate, workers):
+    """Finish the files an interrupted run left in the run journal."""
+    orch = build_orchestrator(fail_rate, workers)
+    if orch.journal is None:
+        raise click.UsageError("RUN_JOURNAL_PATH is empty — no journal to resume from")
+    orch.resume()
+    export_metrics()
+
+@cli.command()
+@click.option("--input", "-i", default="data/payslips", help="Folder containing payslips")
+@click.option("--interval", type=float, default=None, help="Seconds between scheduled polls (default: POLL_INTERVAL)")
+@click.option("--fail-rate", type=float, default=None, help="Override failure rate [0..1]")
+@click.option("--workers", "-w", type=int, default=None, help="Concurrent file workers")
+def serve(input, interval, fail_rate, workers):
+    """Keep everything warm and process new drops on schedule or on SIGUSR1."""
+    import signal
+    from threading import Event
+    from core import config
+    from middleware.sftp_listener import Checkpoint, poll_payslips
+    from observibility import metrics
+    from observibility.logger import logger
+    orch = build_orchestrator(fail_rate, workers)
+    serve_metrics()
+    orch.resume_pending()
+    stop, wake = Event(), Event()
+    def shutdown(signum, frame):
+        stop.set()
+        wake.set()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: wake.set())
+    interval = config.POLL_INTERVAL if interval is None else interval
+    logger.info("serve_started", folder=input, interval=interval, pid=os.getpid())
+    checkpoint = Checkpoint(config.LISTENER_CHECKPOINT)
+    for new_files in poll_payslips(input, checkpoint, interval=interval, stop=stop, wake=wake):
+        try:
+            checkpoint.retry_later(orch.run_folder(input, files=new_files))
+        except Exception as e:
+            # keep serving; this poll's files are handed out again next time
+            checkpoint.discard()
+            metrics.inc("serve_poll_failed_total")
+            logger.opt(exception=e).error("serve_poll_failed", folder=input, error=str(e))
+        export_metrics()
+    if hasattr(orch.client, "close"):
+        orch.client.close()
+    logger.info("serve_stopped")
+
+def build_orchestrator(fail_rate=None, workers=None) -> "Orchestrator":
+    from core import config
+    from core.pipeline import parse_stage_workers
+    from core.rate_limiter import UploadThrottle
+    from core.run_journal import RunJournal
+    from middleware.checksum_index import ChecksumIndex
+    from middleware.storage_mock import load_key
+    from orchestrator import Orchestrator
     employees = load_employees()
-    cache = Cache(os.getenv("REDIS_URL", config.REDIS_URL))
+    cache = make_cache()
     rate = config.FAIL_RATE if fail_rate is None else fail_rate
-    orch = Orchestrator(
+    return Orchestrator(
         employees=employees,
         cache=cache,
         archive_dir=config.ARCHIVE_DIR,
         fail_rate=rate,
         max_attempts=config.RETRY_MAX_ATTEMPTS,
         base_delay=config.RETRY_BASE_DELAY,
+        workers=config.MAX_WORKERS if workers is None else workers,
+        checksum_index=ChecksumIndex(config.CHECKSUM_INDEX_PATH) if config.CHECKSUM_INDEX_PATH else None,
+        batch_size=config.BATCH_SIZE,
+        archive_mode=config.ARCHIVE_MODE,
+        archive_key=load_key(config.ARCHIVE_KEY),
+        client=make_client(rate),
+        upload_batch_threshold=config.UPLOAD_BATCH_THRESHOLD,
+        throttle=UploadThrottle(cache, config.MAX_QPS_GLOBAL, config.MAX_QPS_PER_EMPLOYEE),
+        journal=RunJournal(config.RUN_JOURNAL_PATH) if config.RUN_JOURNAL_PATH else None,
+        stage_workers=parse_stage_workers(config.STAGE_WORKERS),
     )
-    files = list_payslips(input)
-    if not files:
-        logger.info("no_files_found", folder=input)
-    orch.run_folder(input)
 
 if __name__ == "__main__":
     cli()
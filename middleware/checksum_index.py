@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Callable, Iterable, List, Optional
+from middleware.checksum_util import sha256_many, sha256sum, unreadable
+from observibility.metrics import inc
+
+"""
+Persistent checksum index — remembers the SHA256 of files already hashed.
+Entries are keyed by path and validated against (size, mtime_ns, inode), so an
+unchanged file costs one stat() instead of a full read. Backed by SQLite next
+to the archive; stale entries are evicted by age and least-recent use.
+"""
+
+class ChecksumIndex:
+    def __init__(self, path: str, max_entries: int = 200_000, max_age_days: float = 90,
+                 commit_every: int = 256):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.commit_every = commit_every
+        self._lock = Lock()
+        self._dirty = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,"
+            " digest TEXT, used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_used ON files(used)")
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, digest FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if not row or tuple(row[:3]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+                return None
+            self._db.execute("UPDATE files SET used = ? WHERE path = ?", (time.time(), path))
+            self._mark_dirty()
+            return row[3]
+
+    def store(self, path: str, st: os.stat_result, digest: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, digest, time.time()),
+            )
+            self._mark_dirty()
+
+    def digest(self, path: str, hasher: Callable[[str], str] = sha256sum) -> str:
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        cached = self.lookup(key, st)
+        if cached:
+            inc("checksum_index_hit_total")
+            return cached
+        inc("checksum_index_miss_total")
+        digest = hasher(path)
+        self.store(key, st, digest)
+        return digest
+
+    def digest_many(self, paths: Iterable[str],
+                    hasher_many: Callable[[List[str]], List[str | None]] = sha256_many) -> List[str | None]:
+        """Batch variant of `digest`: only the misses are handed to `hasher_many`. Unreadable files give None."""
+        paths = list(paths)
+        stats = [_stat(p) for p in paths]
+        keys = [os.path.abspath(p) for p in paths]
+        digests = [self.lookup(k, st) if st else None for k, st in zip(keys, stats)]
+        misses = [i for i, d in enumerate(digests) if not d and stats[i]]
+        inc("checksum_index_hit_total", len([d for d in digests if d]))
+        if misses:
+            inc("checksum_index_miss_total", len(misses))
+            for i, d in zip(misses, hasher_many([paths[i] for i in misses])):
+                digests[i] = d
+                if d:
+                    self.store(keys[i], stats[i], d)
+        return digests
+
+    def evict(self) -> int:
+        """Drops entries unused for `max_age_days`, then the least recently used beyond `max_entries`."""
+        with self._lock:
+            cur = self._db.execute("DELETE FROM files WHERE used < ?", (time.time() - self.max_age,))
+            removed = cur.rowcount
+            cur = self._db.execute(
+                "DELETE FROM files WHERE path IN ("
+                " SELECT path FROM files ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            removed += cur.rowcount
+            self._db.commit()
+            self._dirty = 0
+            return removed
+
+    def flush(self):
+        with self._lock:
+            self._db.commit()
+            self._dirty = 0
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def _mark_dirty(self):
+        self._dirty += 1
+        if self._dirty >= self.commit_every:
+            self._db.commit()
+            self._dirty = 0
+
+def _stat(path: str) -> os.stat_result | None:
+    try:
+        return os.stat(path)
+    except OSError as e:
+        unreadable(path, e)
+        return None
@@ -0,0 +1,173 @@
+import json
+import mmap
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Mapping
+from observibility.logger import logger
+from observibility.metrics import inc
+
+"""
+Employee directory — indexed lookups over the HiBob employee export.
+
+Sources:
+- `employees.json` — one JSON object keyed by employee_id (parsed once; fine
+  for small orgs, re-parsed in full when the file changes).
+- `*.ndjson` — one record per line with an "employee_id" field. Only byte
+  offsets are kept in memory; records are read lazily from an mmap and kept in
+  a small LRU. When the file only grew (appends), just the new tail is indexed.
+
+Secondary lookups by `hibob_id` and `email` resolve to the employee_id.
+The source is stat()-ed at most every `reload_interval` seconds. A reload
+that fails (file briefly missing during a replace, export half-written) is
+logged and counted in `employee_reload_failed_total`; the last good index
+keeps serving and the reload is retried at the next check.
+"""
+
+_TAIL = 64  # bytes compared to decide whether an NDJSON file was only appended to
+
+class EmployeeDirectory:
+    def __init__(self, path: str | None = None, reload_interval: float = 5.0, cache_size: int = 4096):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.cache_size = cache_size
+        self._lock = Lock()
+        self._records: Dict[str, Dict[str, Any]] | None = None  # JSON object source
+        self._offsets: Dict[str, int] = {}                     # NDJSON source
+        self._by_hibob: Dict[str, str] = {}
+        self._by_email: Dict[str, str] = {}
+        self._lru: OrderedDict = OrderedDict()
+        self._mm: mmap.mmap | None = None
+        self._stat = None
+        self._indexed = 0  # NDJSON bytes indexed so far (always ends on a newline)
+        self._tail = b""
+        self._checked = 0.0
+        if path:
+            self.reload(force=True)
+
+    @classmethod
+    def from_mapping(cls, employees: Mapping[str, Dict[str, Any]]) -> "EmployeeDirectory":
+        d = cls()
+        d._records = dict(employees)
+        _index_secondary(d._records.items(), d._by_hibob, d._by_email)
+        return d
+
+    def __len__(self) -> int:
+        return len(self._records) if self._records is not None else len(self._offsets)
+
+    def get(self, employee_id: str) -> Dict[str, Any] | None:
+        self._maybe_reload()
+        if self._records is not None:
+            return self._records.get(employee_id)
+        with self._lock:
+            rec = self._lru.get(employee_id)
+            if rec is not None:
+                self._lru.move_to_end(employee_id)
+                return rec
+            offset = self._offsets.get(employee_id)
+            if offset is None:
+                return None
+            rec = self._read_line(offset)
+            self._lru[employee_id] = rec
+            if len(self._lru) > self.cache_size:
+                self._lru.popitem(last=False)
+            return rec
+
+    def by_hibob_id(self, hibob_id: str) -> Dict[str, Any] | None:
+        self._maybe_reload()
+        emp = self._by_hibob.get(hibob_id)
+        return self.get(emp) if emp else None
+
+    def by_email(self, email: str) -> Dict[str, Any] | None:
+        self._maybe_reload()
+        emp = self._by_email.get(email.lower())
+        return self.get(emp) if emp else None
+
+    def reload(self, force: bool = False):
+        """Re-indexes the source if it changed; appended NDJSON is indexed incrementally."""
+        if not self.path:
+            return
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                self._reload(force)
+            except (OSError, ValueError) as e:
+                if self._stat is None:
+                    raise  # nothing indexed yet to fall back on
+                inc("employee_reload_failed_total")
+                logger.warning("employee_reload_failed", path=self.path, error=str(e))
+
+    def _reload(self, force: bool):
+        st = os.stat(self.path)
+        old = self._stat
+        if not force and old and (st.st_size, st.st_mtime_ns, st.st_ino) == (old.st_size, old.st_mtime_ns, old.st_ino):
+            return
+        if not self.path.endswith(".ndjson"):
+            with open(self.path, "r") as f:
+                records = json.load(f)
+            by_hibob, by_email = {}, {}
+            _index_secondary(records.items(), by_hibob, by_email)
+            self._records, self._by_hibob, self._by_email = records, by_hibob, by_email
+        else:
+            self._reload_ndjson(st, old, force)
+        self._stat = st
+
+    def _reload_ndjson(self, st: os.stat_result, old: os.stat_result | None, force: bool):
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+        appended = (not force and old is not None and mm is not None
+                    and st.st_ino == old.st_ino and st.st_size >= self._indexed
+                    and mm[max(0, self._indexed - _TAIL):self._indexed] == self._tail)
+        start = self._indexed if appended else 0
+        offsets, by_hibob, by_email = {}, {}, {}
+        indexed = _index_ndjson(mm, start, offsets, by_hibob, by_email) if mm is not None else 0
+        if appended:  # merged only once the tail parsed, so a failure leaves the index intact
+            self._offsets.update(offsets)
+            self._by_hibob.update(by_hibob)
+            self._by_email.update(by_email)
+        else:
+            self._offsets, self._by_hibob, self._by_email = offsets, by_hibob, by_email
+        self._mm, self._indexed = mm, indexed
+        self._tail = mm[max(0, indexed - _TAIL):indexed] if mm is not None else b""
+        self._lru.clear()
+
+    def _read_line(self, offset: int) -> Dict[str, Any]:
+        nl = self._mm.find(b"\n", offset)
+        return json.loads(self._mm[offset:nl if nl != -1 else len(self._mm)])
+
+    def _maybe_reload(self):
+        if self.path and time.monotonic() - self._checked >= self.reload_interval:
+            self.reload()
+
+
+def _index_secondary(items, by_hibob: Dict[str, str], by_email: Dict[str, str]):
+    for emp, rec in items:
+        if rec.get("hibob_id"):
+            by_hibob[rec["hibob_id"]] = emp
+        if rec.get("email"):
+            by_email[rec["email"].lower()] = emp
+
+def _index_ndjson(mm: mmap.mmap, pos: int, offsets: Dict[str, int],
+                  by_hibob: Dict[str, str], by_email: Dict[str, str]) -> int:
+    """
+    Indexes records from byte `pos` on and returns how far it got. A trailing
+    line without newline is indexed only if it already parses (i.e. is not
+    still being written).
+    """
+    end = len(mm)
+    while pos < end:
+        nl = mm.find(b"\n", pos)
+        stop = end if nl == -1 else nl
+        line = mm[pos:stop].strip()
+        if line:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                if nl == -1:
+                    break
+                raise
+            offsets[rec["employee_id"]] = pos
+            _index_secondary(((rec["employee_id"], rec),), by_hibob, by_email)
+        pos = stop + 1 if nl != -1 else end
+    return pos
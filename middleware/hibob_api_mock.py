@@ -1,5 +1,6 @@
 import random
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Tuple
 from observibility.logger import logger
 from observibility.metrics import inc
 
@@ -7,6 +8,8 @@ from observibility.metrics import inc
 Mock HiBob API integration.
 Simulates employee lookup and payslip upload behavior for testing the automation pipeline.
 Includes configurable fail_rate to mimic real-world transient upload errors.
+`MockHiBobClient` exposes the same interface as `hibob_client.HiBobClient`;
+its optional `latency` (seconds per request) stands in for the network.
 """
 
 def find_employee(employees: dict, employee_id: str) -> Dict[str, Any] | None:
@@ -20,3 +23,22 @@ def upload_payslip(hibob_id: str, file_path: str, fail_rate: float = 0.0) -> dic
     inc("hibob_upload_success_total")
     logger.info("hibob_upload_ok", hibob_id=hibob_id, file=file_path)
     return {"status": "ok", "hibob_id": hibob_id}
+
+def upload_batch(items: List[Tuple[str, str]], fail_rate: float = 0.0) -> List[dict]:
+    return [upload_payslip(hibob_id, file_path, fail_rate) for hibob_id, file_path in items]
+
+class MockHiBobClient:
+    def __init__(self, fail_rate: float = 0.0, batch_size: int = 50, latency: float = 0.0):
+        self.fail_rate = fail_rate
+        self.batch_size = batch_size
+        self.latency = latency
+
+    def upload_payslip(self, hibob_id: str, file_path: str) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+        return upload_payslip(hibob_id, file_path, self.fail_rate)
+
+    def upload_batch(self, items: List[Tuple[str, str]]) -> List[dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return upload_batch(items, self.fail_rate)
@@ -0,0 +1,97 @@
+import os
+import time
+from contextlib import ExitStack
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from observibility.logger import logger
+from observibility.metrics import inc
+
+"""
+HiBob HTTP client.
+Uploads payslips over one pooled `requests.Session` (keep-alive, bounded
+per-host connection pool) and supports batched multipart submission of many
+payslips per request. Responses follow the mock's contract:
+{"status": "ok" | "error", ...} per payslip. HTTP errors carry "http_status"
+and, when the server sent Retry-After (seconds or an HTTP date), "retry_after"
+in seconds.
+
+Endpoints (relative to `base_url`):
+- POST /payslips        — one multipart file + hibob_id
+- POST /payslips/batch  — files file0..fileN with hibob_id0..hibob_idN;
+                          replies {"results": [...]} in the same order
+"""
+
+class HiBobClient:
+    def __init__(self, base_url: str, token: str | None = None, pool_size: int = 10,
+                 timeout: float = 30.0, batch_size: int = 50):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def upload_payslip(self, hibob_id: str, file_path: str) -> dict:
+        with open(file_path, "rb") as f:
+            res = self._post("/payslips", data={"hibob_id": hibob_id},
+                             files={"file": (os.path.basename(file_path), f, "application/pdf")})
+        self._count(res)
+        return res
+
+    def upload_batch(self, items: List[Tuple[str, str]]) -> List[dict]:
+        with ExitStack() as stack:
+            data, files = {}, {}
+            for i, (hibob_id, file_path) in enumerate(items):
+                data[f"hibob_id{i}"] = hibob_id
+                files[f"file{i}"] = (os.path.basename(file_path),
+                                     stack.enter_context(open(file_path, "rb")), "application/pdf")
+            res = self._post("/payslips/batch", data=data, files=files)
+        if res.get("status") == "error":
+            # the whole request failed — report it against every item
+            results = [res] * len(items)
+        else:
+            results = res["results"]
+        for r in results:
+            self._count(r)
+        logger.info("hibob_batch_uploaded", size=len(items),
+                    ok=sum(r.get("status") == "ok" for r in results))
+        return results
+
+    def close(self):
+        self.session.close()
+
+    def _post(self, path: str, **kwargs) -> dict:
+        try:
+            resp = self.session.post(self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            return {"status": "error", "message": str(e)}
+        if resp.status_code >= 400:
+            return {"status": "error", "message": f"HTTP {resp.status_code}",
+                    "http_status": resp.status_code, "retry_after": _retry_after(resp.headers.get("Retry-After"))}
+        return resp.json()
+
+    @staticmethod
+    def _count(res: dict):
+        inc("hibob_upload_success_total" if res.get("status") == "ok" else "hibob_upload_fail_total")
+
+def _retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date); None if absent or malformed."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:  # "-0000": UTC without a stated source zone
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - time.time())
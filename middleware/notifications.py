@@ -1,9 +1,17 @@
+import time
+from collections import Counter
+from threading import Condition, Thread
 from observibility.logger import logger
 
 """
 Mock notification module.
 Simulates sending Slack and Email alerts by logging the messages instead of actually sending them.
 Used for visibility and debugging during local testing.
+
+`NotificationAggregator` keeps per-file outcomes off the hot path: events are
+queued and a background thread collapses them into one summary per batch
+(`max_batch` events) or time window (`window` seconds) — counts per outcome
+plus the list of failures — sent through `slack_notify`.
 """
 
 def slack_notify(text: str, **ctx):
@@ -11,3 +19,57 @@ def slack_notify(text: str, **ctx):
 
 def email_notify(subject: str, body: str, **ctx):
     logger.info("email_notify", subject=subject, body=body, **ctx)
+
+
+class NotificationAggregator:
+    def __init__(self, send=slack_notify, window: float = 30.0, max_batch: int = 1000,
+                 max_failures_listed: int = 20):
+        self.send = send
+        self.window = window
+        self.max_batch = max_batch
+        self.max_failures_listed = max_failures_listed
+        self._events = []
+        self._cond = Condition()
+        self._thread = None
+        self._window_start = None
+
+    def record(self, outcome: str, filename: str, error: str | None = None):
+        """Queues one file outcome (e.g. "uploaded", "failed", "duplicate"); never blocks on sending."""
+        with self._cond:
+            if not self._events:
+                self._window_start = time.monotonic()
+            self._events.append((outcome, filename, error))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="notify-aggregator", daemon=True)
+                self._thread.start()
+            if len(self._events) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self):
+        """Sends a summary of everything queued so far (no-op when empty)."""
+        with self._cond:
+            events, self._events = self._events, []
+        if events:
+            self._send_summary(events)
+
+    def _send_summary(self, events):
+        counts = Counter(outcome for outcome, _, _ in events)
+        failures = [{"file": f, "error": e} for outcome, f, e in events if outcome == "failed"]
+        parts = ", ".join(f"{n} {outcome}" for outcome, n in sorted(counts.items()))
+        icon = "❌" if failures else "✅"
+        try:
+            self.send(f"{icon} Payslip batch: {parts}", counts=dict(counts),
+                      failures=failures[:self.max_failures_listed],
+                      failures_truncated=max(0, len(failures) - self.max_failures_listed))
+        except Exception as e:
+            logger.error("notify_summary_failed", error=str(e), events=len(events))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._events:
+                    self._cond.wait()
+                due = self._window_start + self.window
+                while self._events and len(self._events) < self.max_batch and time.monotonic() < due:
+                    self._cond.wait(due - time.monotonic())
+            self.flush()
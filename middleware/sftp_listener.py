@@ -1,11 +1,129 @@
-from pathlib import Path
-from typing import List
+import json
+import os
+import time
+from threading import Event
+from typing import Iterable, Iterator, List
 
 """
-Utility function to list all payslip PDF files in a given folder.
+SFTP listener — discovers incoming payslip PDFs in a (mocked) SFTP folder.
 Used by the orchestrator to discover incoming files for processing.
+
+- `iter_payslips()` streams directory entries via os.scandir (no full listing in memory).
+- `iter_new_payslips()` yields only files new or changed since a persisted
+  high-water mark (`Checkpoint`), keyed on mtime_ns.
+- `poll_payslips()` is the watch mode: one `iter_new_payslips` pass per interval.
 """
 
+def iter_payslips(folder: str) -> Iterator[str]:
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name.endswith(".pdf") and entry.is_file():
+                yield entry.path
+
 def list_payslips(folder: str) -> List[str]:
-    p = Path(folder)
-    return [str(f) for f in p.glob("*.pdf")]
+    return list(iter_payslips(folder))
+
+
+class Checkpoint:
+    """
+    High-water mark of the newest mtime_ns already handed out, plus the names
+    sharing that exact mtime (so equal timestamps are not lost or repeated).
+    Files dropped with an mtime older than the mark (e.g. `cp -p`) are not seen.
+    Names passed to `retry_later()` (uploads that failed for good, files claimed
+    by another worker or unreadable at hash time) are handed out again on every
+    pass until they are processed successfully.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.mtime_ns = 0
+        self.names = set()
+        self.retry = set()
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                state = json.load(f)
+            self.mtime_ns = state.get("mtime_ns", 0)
+            self.names = set(state.get("names", []))
+            self.retry = set(state.get("retry", []))
+        self._pending = (self.mtime_ns, set(self.names))
+        self._pending_retry = set(self.retry)
+
+    def is_new(self, name: str, mtime_ns: int) -> bool:
+        return (name in self.retry or mtime_ns > self.mtime_ns
+                or (mtime_ns == self.mtime_ns and name not in self.names))
+
+    def observe(self, name: str, mtime_ns: int):
+        self._pending_retry.discard(name)
+        hwm, names = self._pending
+        if mtime_ns > hwm:
+            self._pending = (mtime_ns, {name})
+        elif mtime_ns == hwm:
+            names.add(name)
+
+    def discard(self):
+        """Forgets what was observed since the last save (the pass failed; hand it all out again)."""
+        self._pending = (self.mtime_ns, set(self.names))
+        self._pending_retry = set(self.retry)
+
+    def retry_later(self, paths: Iterable[str]):
+        """Keeps files that were handed out but not processed eligible for the next pass."""
+        self._pending_retry.update(os.path.basename(p) for p in paths)
+
+    def save(self):
+        """Commits everything observed so far; call once the yielded files are processed."""
+        self.mtime_ns, names = self._pending
+        self.names = set(names)
+        self.retry = set(self._pending_retry)
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"mtime_ns": self.mtime_ns, "names": sorted(self.names), "retry": sorted(self.retry)}, f)
+        os.replace(tmp, self.path)
+
+
+def iter_new_payslips(folder: str, checkpoint: Checkpoint, min_age: float = 0.0,
+                      too_fresh: List[int] | None = None) -> Iterator[str]:
+    """
+    Yields files new or modified since `checkpoint`; skips files touched within
+    `min_age` seconds (their mtime_ns is appended to `too_fresh`, if given).
+    """
+    cutoff = time.time_ns() - int(min_age * 1e9)
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not entry.name.endswith(".pdf") or not entry.is_file():
+                continue
+            mtime_ns = entry.stat().st_mtime_ns
+            if not checkpoint.is_new(entry.name, mtime_ns):
+                continue
+            if mtime_ns > cutoff:
+                if too_fresh is not None:
+                    too_fresh.append(mtime_ns)
+                continue
+            checkpoint.observe(entry.name, mtime_ns)
+            yield entry.path
+
+def poll_payslips(folder: str, checkpoint: Checkpoint, interval: float = 5.0,
+                  min_age: float = 1.0, stop: Event | None = None,
+                  wake: Event | None = None) -> Iterator[Iterator[str]]:
+    """
+    Watch mode: yields one stream of new files per poll. The checkpoint is
+    saved when the consumer asks for the next poll, i.e. after it has
+    processed the previous stream. Setting `wake` starts the next poll right
+    away instead of waiting out `interval` (set it together with `stop` to exit).
+    Files skipped only for being younger than `min_age` are picked up as soon
+    as they are old enough, not an `interval` later.
+    """
+    stop = stop or Event()
+    while not stop.is_set():
+        too_fresh = []
+        yield iter_new_payslips(folder, checkpoint, min_age, too_fresh)
+        checkpoint.save()
+        delay = interval
+        if too_fresh:
+            delay = min(interval, max(0.01, min(too_fresh) / 1e9 + min_age - time.time()))
+        if wake is None:
+            stop.wait(delay)
+        else:
+            wake.wait(delay)
+            wake.clear()
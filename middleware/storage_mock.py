@@ -1,19 +1,143 @@
+import os
+import struct
+from contextlib import suppress
 from pathlib import Path
-from shutil import copy2
+from shutil import copyfileobj, copystat
 from observibility.logger import logger
 
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except Exception:
+    AESGCM = None
+
 """
-Mock storage module.
-Simulates encryption and archiving of processed payslips by copying them into an archive folder.
-In a real system, this step would perform encryption and secure upload to cloud/object storage.
+Storage module.
+Archives processed payslips into an archive folder. Modes:
+- "copy"   — kernel-side copy (copy_file_range / sendfile), metadata preserved.
+- "link"   — hardlink into the archive (falls back to "copy" across devices).
+- "aesgcm" — streaming AES-256-GCM encryption in fixed-size chunks, so memory
+             stays constant regardless of file size (requires `cryptography`).
+In a real system the archive would then be shipped to cloud/object storage.
+
+Encrypted file layout: MAGIC | nonce prefix (7B) | chunk size (u32), then one
+GCM-sealed record per chunk. Each record's nonce is prefix | counter (u32) |
+last-flag (1B), which rejects reordered, truncated or extended archives.
 """
 
+ARCHIVE_MODES = ("copy", "link", "aesgcm")
+CHUNK_SIZE = 1 << 20
+MAGIC = b"PSA1"
+_HEADER = struct.Struct(">4s7sI")
+_TAG = 16
+
 def ensure_dir(path: str):
     Path(path).mkdir(parents=True, exist_ok=True)
 
-def encrypt_copy(src: str, dst_dir: str) -> str:
+def load_key(value: str | None) -> bytes | None:
+    """Parses a hex-encoded 256-bit key (e.g. from ARCHIVE_KEY)."""
+    if not value:
+        return None
+    key = bytes.fromhex(value)
+    if len(key) != 32:
+        raise ValueError("archive key must be 32 bytes (64 hex chars)")
+    return key
+
+def check_archive_mode(mode: str, key: bytes | None = None):
+    """Fails fast on settings `encrypt_copy` would only reject after a file was uploaded."""
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"unknown archive mode: {mode}")
+    if mode == "aesgcm":
+        if key is None:
+            raise ValueError("aesgcm archive mode requires a key")
+        if AESGCM is None:
+            raise RuntimeError("aesgcm archive mode requires the 'cryptography' package")
+
+def _unlink(path: str):
+    # never write through an existing hardlink to the source
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+
+def fast_copy(src: str, dst: str):
+    _unlink(dst)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        try:
+            while remaining > 0:
+                if hasattr(os, "copy_file_range"):
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                else:
+                    n = os.sendfile(fdst.fileno(), fsrc.fileno(), None, remaining)
+                if n == 0:
+                    break
+                remaining -= n
+        except OSError:
+            # unsupported by this filesystem pair — finish in userspace
+            fsrc.seek(fdst.tell())
+            copyfileobj(fsrc, fdst, CHUNK_SIZE)
+    copystat(src, dst)
+
+def link_or_copy(src: str, dst: str):
+    _unlink(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        fast_copy(src, dst)
+
+def _nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", counter, last)
+
+def encrypt_stream(src: str, dst: str, key: bytes, chunk_size: int = CHUNK_SIZE):
+    if AESGCM is None:
+        raise RuntimeError("aesgcm archive mode requires the 'cryptography' package")
+    aead = AESGCM(key)
+    header = _HEADER.pack(MAGIC, os.urandom(7), chunk_size)
+    prefix = header[4:11]
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        fout.write(header)
+        chunk = fin.read(chunk_size)
+        counter = 0
+        while True:
+            nxt = fin.read(chunk_size)
+            last = not nxt
+            fout.write(aead.encrypt(_nonce(prefix, counter, last), chunk, header))
+            if last:
+                break
+            chunk, counter = nxt, counter + 1
+
+def decrypt_stream(src: str, dst: str, key: bytes):
+    if AESGCM is None:
+        raise RuntimeError("aesgcm archive mode requires the 'cryptography' package")
+    aead = AESGCM(key)
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        header = fin.read(_HEADER.size)
+        magic, prefix, chunk_size = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"not an encrypted archive: {src}")
+        record = fin.read(chunk_size + _TAG)
+        counter = 0
+        while True:
+            nxt = fin.read(chunk_size + _TAG)
+            last = not nxt
+            fout.write(aead.decrypt(_nonce(prefix, counter, last), record, header))
+            if last:
+                break
+            record, counter = nxt, counter + 1
+
+def encrypt_copy(src: str, dst_dir: str, mode: str = "copy", key: bytes | None = None) -> str:
     ensure_dir(dst_dir)
     target = Path(dst_dir) / Path(src).name
-    copy2(src, target)
-    logger.info("archive_written", path=str(target))
+    if mode == "aesgcm":
+        if key is None:
+            raise ValueError("aesgcm archive mode requires a key")
+        target = target.with_name(target.name + ".enc")
+        tmp = target.with_name(target.name + ".part")
+        encrypt_stream(src, str(tmp), key)
+        os.replace(tmp, target)
+    elif mode == "link":
+        link_or_copy(src, str(target))
+    elif mode == "copy":
+        fast_copy(src, str(target))
+    else:
+        raise ValueError(f"unknown archive mode: {mode}")
+    logger.info("archive_written", path=str(target), mode=mode)
     return str(target)
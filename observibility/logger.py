@@ -1,21 +1,96 @@
 from loguru import logger
+import atexit
+import itertools
+import json
+import random
 import sys
-import uuid
 import os
-from datetime import datetime, UTC
+import time
+from threading import Condition, Thread
 
 """
 Centralized logging configuration using Loguru.
 - Provides colorized console logs in local/dev environments.
 - Switches to structured JSON logs in production for ingestion by ELK/Loki.
+- LOG_MODE=batch buffers JSON records and writes them in batches from a
+  background thread (flushed on ERROR, every LOG_FLUSH_INTERVAL, and at exit).
+- Success-path records can be sampled per event (LOG_SAMPLE_RATE default,
+  LOG_SAMPLE_RATES="hibob_upload_ok=0.1,prepare_file=0.05"); WARNING and above
+  are always kept.
 - Includes a helper `with_trace()` to attach trace_id and timestamp to log context.
 """
 
 ENV = os.getenv("ENV", "local").lower()
+LOG_MODE = os.getenv("LOG_MODE", "console" if ENV in ("local", "dev") else "json").lower()
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "512"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+def _parse_rates(spec: str) -> dict:
+    rates = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+SAMPLE_RATES = _parse_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+def _event_key(record) -> str:
+    # structured calls log a bare event name; free-text messages are keyed by call site
+    msg = record["message"]
+    return msg if msg.isidentifier() else record["function"]
+
+def sample_filter(record) -> bool:
+    if record["level"].no >= 30:  # WARNING
+        return True
+    rate = SAMPLE_RATES.get(_event_key(record), LOG_SAMPLE_RATE)
+    return rate >= 1.0 or random.random() < rate
+
+
+class BatchedJsonSink:
+    """Loguru sink that serializes records to JSON lines and writes them in batches."""
+
+    def __init__(self, stream=sys.stdout, batch_size: int = 512, interval: float = 1.0):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.interval = interval
+        self._buf = []
+        self._cond = Condition()
+        self._urgent = False
+        Thread(target=self._run, name="log-flusher", daemon=True).start()
+        atexit.register(self.flush)
+
+    def __call__(self, message):
+        r = message.record
+        line = {"ts": r["time"].timestamp(), "level": r["level"].name, "event": r["message"], **r["extra"]}
+        if r["exception"] is not None:
+            line["exception"] = str(r["exception"].value)
+        data = json.dumps(line, default=str)
+        with self._cond:
+            self._buf.append(data)
+            if r["level"].no >= 40 or len(self._buf) >= self.batch_size:
+                self._urgent = True
+                self._cond.notify()
+
+    def flush(self):
+        with self._cond:
+            batch, self._buf = self._buf, []
+            self._urgent = False
+        if batch:
+            self.stream.write("\n".join(batch) + "\n")
+            self.stream.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._urgent:
+                    self._cond.wait(self.interval)
+            self.flush()
+
 
 logger.remove()
 
-if ENV in ("local", "dev"):
+if LOG_MODE == "console":
     logger.add(
         sys.stdout,
         colorize=True,
@@ -23,6 +98,13 @@ if ENV in ("local", "dev"):
                "<cyan>{message}</cyan> <dim>{extra}</dim>",
         level="INFO",
         enqueue=False,
+        filter=sample_filter,
+    )
+elif LOG_MODE == "batch":
+    logger.add(
+        BatchedJsonSink(sys.stdout, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL),
+        level="INFO",
+        filter=sample_filter,
     )
 else:
     logger.add(
@@ -30,10 +112,18 @@ else:
         serialize=True,
         enqueue=True,
         level="INFO",
+        filter=sample_filter,
     )
 
+# trace ids: random per-process prefix + counter — unique without a uuid4 per file
+_TRACE_PREFIX = os.urandom(4).hex()
+_trace_seq = itertools.count(1)
+
+def new_trace_id() -> str:
+    return f"{_TRACE_PREFIX}-{next(_trace_seq):x}"
+
 def with_trace(extra=None):
-    base = {"trace_id": str(uuid.uuid4()), "ts": datetime.now(UTC).isoformat()}
+    base = {"trace_id": new_trace_id(), "ts": time.time()}
     if extra:
         base.update(extra)
-    return base
\ No newline at end of file
+    return base
@@ -1,22 +1,182 @@
-from collections import defaultdict
-from datetime import datetime
+import bisect
+import os
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, UTC
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import RLock, Thread, local
+from typing import Dict, Tuple
 
 """
-Lightweight in-memory metrics collector (mock Prometheus replacement).
-Used for local testing when Prometheus is not available.
+In-process metrics registry with Prometheus text exposition.
 
-- `inc()` increments a counter by key.
+- Counters and histograms are sharded per thread: the hot path (`inc()`,
+  `observe()`) touches only the calling thread's shard, with no lock; readers
+  merge all shards.
+- `inc()` increments a counter by key (optionally labelled).
+- `observe()` / `timer()` record into fixed-bucket latency histograms.
+- `set_gauge()` sets a point-in-time value (queue depth, utilisation).
 - `snapshot()` returns the current state of all counters.
-- `metric_event()` produces a timestamped metric event dict (for logging or export).
+- `render_prometheus()`, `write_prometheus()` (textfile collector) and
+  `serve_http()` (/metrics endpoint) expose everything in Prometheus format.
+- `metric_event()` records a labelled sample (so it shows up as a time series)
+  and returns a timestamped event dict for logging.
 """
 
-COUNTERS = defaultdict(int)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
 
-def inc(key: str, n: int = 1):
-    COUNTERS[key] += n
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_tls = local()
+_shards = []  # (counters, histograms) of every live thread
+_base = ({}, {})  # totals of threads that have exited
+_shards_lock = RLock()  # reentrant: a shard may retire while this thread merges
+_gauges: Dict[Key, float] = {}
+
+class _Owner:
+    """Lives in the thread-local; when the thread exits it is collected and retires its shard."""
+    __slots__ = ("__weakref__",)
+
+def _key(name: str, labels: dict) -> Key:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ())
+
+def _shard():
+    shard = getattr(_tls, "shard", None)
+    if shard is None:
+        shard = _tls.shard = ({}, {})
+        _tls.owner = _Owner()
+        weakref.finalize(_tls.owner, _retire, shard)
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+def _retire(shard):
+    with _shards_lock:
+        _fold(_base, shard)
+        _shards.remove(shard)
+
+def _fold(dst, shard):
+    counters, hists = dst
+    c, h = shard
+    for k, v in c.copy().items():
+        counters[k] = counters.get(k, 0) + v
+    for k, (buckets, total, count) in h.copy().items():
+        agg = hists.setdefault(k, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+        agg[0] = [a + b for a, b in zip(agg[0], buckets)]
+        agg[1] += total
+        agg[2] += count
+
+def inc(key: str, n: int = 1, **labels):
+    counters = _shard()[0]
+    k = _key(key, labels)
+    counters[k] = counters.get(k, 0) + n
+
+def observe(name: str, value: float, **labels):
+    hists = _shard()[1]
+    k = _key(name, labels)
+    h = hists.get(k)
+    if h is None:
+        h = hists[k] = [[0] * (len(BUCKETS) + 1), 0.0, 0]  # per-bucket counts, sum, count
+    h[0][bisect.bisect_left(BUCKETS, value)] += 1
+    h[1] += value
+    h[2] += 1
+
+@contextmanager
+def timer(name: str, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def set_gauge(name: str, value: float, **labels):
+    _gauges[_key(name, labels)] = value
+
+def _merged():
+    merged = ({}, {})
+    with _shards_lock:  # a retiring shard moves into _base atomically w.r.t. readers
+        _fold(merged, _base)
+        for shard in list(_shards):
+            _fold(merged, shard)
+    return merged
+
+def _fmt(name: str, labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return f"{name}{{{','.join(parts)}}}" if parts else name
 
 def snapshot():
-    return dict(COUNTERS)
+    counters, _ = _merged()
+    return {_fmt(name, labels): v for (name, labels), v in counters.items()}
+
+def histograms():
+    """{series: {"buckets": {le: cumulative}, "sum": s, "count": n}} merged across threads."""
+    _, hists = _merged()
+    out = {}
+    for (name, labels), (buckets, total, count) in hists.items():
+        cumulative, acc = {}, 0
+        for le, c in zip(BUCKETS + (float("inf"),), buckets):
+            acc += c
+            cumulative[le] = acc
+        out[_fmt(name, labels)] = {"buckets": cumulative, "sum": total, "count": count}
+    return out
+
+def render_prometheus() -> str:
+    counters, hists = _merged()
+    lines, typed = [], set()
+    def type_line(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+    for (name, labels), v in sorted(counters.items()):
+        type_line(name, "counter")
+        lines.append(f"{_fmt(name, labels)} {v}")
+    for (name, labels), v in sorted(_gauges.copy().items()):
+        type_line(name, "gauge")
+        lines.append(f"{_fmt(name, labels)} {v}")
+    for (name, labels), (buckets, total, count) in sorted(hists.items()):
+        type_line(name, "histogram")
+        acc = 0
+        for le, c in zip(BUCKETS + (float("inf"),), buckets):
+            acc += c
+            bound = "+Inf" if le == float("inf") else repr(le)
+            le_label = f'le="{bound}"'
+            lines.append(f"{_fmt(name + '_bucket', labels, le_label)} {acc}")
+        lines.append(f"{_fmt(name + '_sum', labels)} {total}")
+        lines.append(f"{_fmt(name + '_count', labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: str):
+    """Atomically writes the exposition (node_exporter textfile collector format)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve_http(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves /metrics on a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
 
-def metric_event(name: str, **labels):
-    return {"metric": name, "labels": labels, "ts": datetime.utcnow().isoformat() + "Z"}
+def metric_event(name: str, value: float = 1, **labels):
+    inc(name, value, **labels)
+    return {"metric": name, "value": value, "labels": labels, "ts": datetime.now(UTC).isoformat()}
@@ -1,43 +1,230 @@
 from pathlib import Path
-from typing import Dict, Any
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List
 from observibility.logger import logger, with_trace
-from middleware.checksum_util import sha256sum
+from middleware.checksum_util import sha256_many, sha256sum
+from middleware.checksum_index import ChecksumIndex
 from core.cache import Cache
-from middleware.hibob_api_mock import find_employee, upload_payslip
-from middleware.notifications import slack_notify
-from middleware.storage_mock import encrypt_copy
-from observibility.metrics import inc, snapshot
-import re, os
+from middleware.hibob_api_mock import MockHiBobClient
+from middleware.employee_directory import EmployeeDirectory
+from middleware.notifications import NotificationAggregator
+from middleware.storage_mock import check_archive_mode, encrypt_copy
+from middleware.sftp_listener import iter_payslips
+from observibility.metrics import inc, set_gauge, snapshot, timer
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from core.retry_handler import RetryAfter, RetryScheduler
+from core.rate_limiter import UploadThrottle
+from core.run_journal import RunJournal
+from core.work_lease import LeaseManager, shard_of
+from core.pipeline import Pipeline, Stage
+from core import config
+from threading import Event, Lock, Semaphore
+import platform, re, os, time
 
 """
 Orchestrator — Core workflow manager for payslip processing.
 
 This component coordinates the end-to-end pipeline:
-1. Scans payslip PDFs in a folder.
-2. Deduplicates using checksum and Redis cache.
-3. Parses employee metadata from filename (e.g., EMP001_202511.pdf).
-4. Uploads each payslip to the (mocked) HR API with retry logic.
-5. Archives successfully processed files.
-6. Emits metrics and logs for observability and FinOps tracking.
+1. Streams payslip PDFs from a folder (or any iterable of paths) in batches
+   through a staged pipeline (`core.pipeline`): hash → dedup/lookup → upload,
+   with bounded queues and per-stage worker counts, so disk, CPU and network
+   work overlap and a slow stage backpressures discovery. Uploads are handed
+   to the retry scheduler without waiting; at most `batch_size` of them are
+   in flight (uploading, backing off or archiving) at once.
+2. Deduplicates using checksum and Redis cache — a folder's checksums are
+   looked up in one batch, and uploads are claimed atomically (SET NX) so
+   concurrent workers never upload the same content twice.
+3. Parses employee metadata from filename (e.g., EMP001_202511.pdf) and
+   resolves it through the indexed `EmployeeDirectory`.
+4. Uploads each payslip to HiBob (mock or pooled HTTP client) — one request per
+   file, or multi-file batches when a chunk exceeds `upload_batch_threshold`;
+   failed attempts are parked in a jittered delay queue (`RetryScheduler`) so
+   other files keep moving.
+5. Archives successfully processed files (copy / hardlink / streaming AES-GCM)
+   on the archive pool as each upload settles, overlapping with the next uploads.
+6. `workers` sizes concurrent upload requests and the archive pool;
+   `stage_workers` overrides any of them (e.g. {"hash": 2, "upload": 16}).
+7. Journals per-file state transitions (`RunJournal`), plus the folder of a
+   full scan, so `resume()` can finish a crashed run without re-uploading;
+   `resume_pending()` does so before a new run reuses the journal.
+8. Optionally shares a folder between several nodes (`run_distributed`):
+   files are leased through Redis so each is worked on by one node at a time.
+9. Emits metrics and logs for observability and FinOps tracking.
 
 Key integrations:
 - Cache (Redis or in-memory)
-- HiBob API mock for uploads
-- Slack notifications for errors and success
-- Prometheus-style counters via `observibility.metrics`
+- HiBob client (`MockHiBobClient` by default, `HiBobClient` over HTTP)
+- Slack notifications, aggregated into one summary per batch / time window
+- Prometheus counters and per-stage latency histograms
+  (`stage_duration_seconds{stage=...}`) via `observibility.metrics`
 """
 
+class _InFlight:
+    """Uploads handed off by the upload stage: caps how many are in flight and collects their outcome."""
+
+    def __init__(self, limit: int):
+        self._slots = Semaphore(limit)
+        self._lock = Lock()
+        self._pending = {}
+        self.failed: List[str] = []
+        self.deferred: List[str] = []  # not processed this run (claimed elsewhere, unreadable)
+        self.error: BaseException | None = None
+
+    def acquire(self, n: int):
+        for _ in range(n):
+            self._slots.acquire()
+
+    def release(self, n: int):
+        for _ in range(n):
+            self._slots.release()
+
+    def defer(self, file_paths: Iterable[str]):
+        with self._lock:
+            self.deferred.extend(file_paths)
+
+    def track(self, done: Future, file_path: str):
+        with self._lock:
+            self._pending[done] = file_path
+            set_gauge("uploads_in_flight", len(self._pending))
+        done.add_done_callback(self._settled)
+
+    def _settled(self, done: Future):
+        with self._lock:
+            file_path = self._pending.pop(done)
+            set_gauge("uploads_in_flight", len(self._pending))
+            if done.exception() is not None or not done.result():
+                self.failed.append(file_path)
+            if done.exception() is not None and self.error is None:
+                self.error = done.exception()
+        self._slots.release()
+
+    def wait(self):
+        """Waits for every tracked upload to be archived or failed; re-raises the first error."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+        if self.error is not None:
+            raise self.error
+
+class _Job:
+    """A file that passed dedup/parse/lookup and holds its upload claims."""
+    __slots__ = ("file_path", "filename", "checksum", "dedup_key", "ctx", "meta", "hibob_id", "claim_key")
+
+    def __init__(self, file_path: str, filename: str, checksum: str, dedup_key: str,
+                 ctx: Dict[str, Any], meta: Dict[str, str], hibob_id: str, claim_key: str):
+        self.file_path = file_path
+        self.filename = filename
+        self.checksum = checksum
+        self.dedup_key = dedup_key
+        self.ctx = ctx
+        self.meta = meta
+        self.hibob_id = hibob_id
+        self.claim_key = claim_key
+
+_UNCHECKED = object()  # `seen` was not looked up in a batch
+_CLAIMED = object()  # another worker holds the upload claim; not a final outcome for this file
+
+STAGE_SECONDS = "stage_duration_seconds"
+
+def _timed_sha256(path: str) -> str:
+    with timer(STAGE_SECONDS, stage="hash"):
+        return sha256sum(path)
+
+def _raise_for_upload(res: dict):
+    if res.get("status") == "ok":
+        return
+    if res.get("http_status") == 429:
+        raise RetryAfter(float(res.get("retry_after") or 1.0), "HiBob rate limit (429)")
+    raise RuntimeError(res.get("message", "upload failed"))
+
+def _chain(src: Future, dst: Future):
+    """Completes `dst` with the outcome of `src`, appending its attempts."""
+    def copy(f: Future):
+        dst.attempts.extend(f.attempts)
+        if f.exception() is not None:
+            dst.set_exception(f.exception())
+        else:
+            dst.set_result(f.result())
+    src.add_done_callback(copy)
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
 EMP_RE = re.compile(r"^(?P<emp>[A-Za-z0-9]+)_(?P<ym>\d{6})\.pdf$")
 
 class Orchestrator:
-    def __init__(self, employees: Dict[str, Any], cache: Cache, archive_dir: str,
-                 fail_rate: float, max_attempts: int, base_delay: float):
+    def __init__(self, employees: EmployeeDirectory | Dict[str, Any], cache: Cache, archive_dir: str,
+                 fail_rate: float, max_attempts: int, base_delay: float,
+                 workers: int = 1, checksum_index: ChecksumIndex | None = None,
+                 batch_size: int = 500, archive_mode: str = "copy",
+                 archive_key: bytes | None = None, client=None,
+                 upload_batch_threshold: int | None = None,
+                 throttle: UploadThrottle | None = None,
+                 notifier: NotificationAggregator | None = None,
+                 journal: RunJournal | None = None,
+                 stage_workers: Dict[str, int] | None = None):
+        check_archive_mode(archive_mode, archive_key)  # before anything is uploaded and dedup-marked
+        if not isinstance(employees, EmployeeDirectory):
+            employees = EmployeeDirectory.from_mapping(employees)
         self.employees = employees
         self.cache = cache
         self.archive_dir = archive_dir
         self.fail_rate = fail_rate
         self.max_attempts = max_attempts
         self.base_delay = base_delay
+        self.workers = max(1, workers)
+        self.checksum_index = checksum_index
+        self.batch_size = max(1, batch_size)
+        self.archive_mode = archive_mode
+        self.archive_key = archive_key
+        # anything with upload_payslip(hibob_id, path) / upload_batch(items), e.g. HiBobClient
+        self.client = client or MockHiBobClient(fail_rate)
+        # chunks with more uploads than this go through client.upload_batch (None: never)
+        self.upload_batch_threshold = upload_batch_threshold
+        self.throttle = throttle
+        self.notifier = notifier or NotificationAggregator(window=config.NOTIFY_WINDOW)
+        self.journal = journal
+        # "upload" sizes the retry scheduler (concurrent requests), "archive" the archive pool
+        self.stage_workers = {"hash": 1, "dedup": 1, "upload": self.workers, "archive": self.workers,
+                              **(stage_workers or {})}
+        self.retrier = RetryScheduler(max_attempts, base_delay, workers=self.stage_workers["upload"])
+        self._archiver = ThreadPoolExecutor(max_workers=self.stage_workers["archive"], thread_name_prefix="archive")
+        # checksums currently being processed by a worker of this orchestrator;
+        # guards the get-then-set dedup window when identical content races
+        self._inflight: Dict[str, Event] = {}
+        self._inflight_lock = Lock()
+        self._claim_token = f"{platform.node()}:{os.getpid()}"
+
+    def _claim(self, checksum: str) -> bool:
+        """Blocks until no other worker holds `checksum`, then takes it. Returns True if it had to wait."""
+        waited = False
+        while True:
+            with self._inflight_lock:
+                done = self._inflight.get(checksum)
+                if done is None:
+                    self._inflight[checksum] = Event()
+                    return waited
+            done.wait()
+            waited = True
+
+    def _release(self, checksum: str):
+        with self._inflight_lock:
+            self._inflight.pop(checksum).set()
+
+    def checksum(self, file_path: str) -> str:
+        if self.checksum_index is not None:
+            return self.checksum_index.digest(file_path, _timed_sha256)
+        return _timed_sha256(file_path)
+
+    def checksums(self, files: List[str]) -> List[str | None]:
+        if self.checksum_index is not None:
+            return self.checksum_index.digest_many(files, self._hash_many)
+        return self._hash_many(files)
+
+    def _hash_many(self, files: List[str]) -> List[str | None]:
+        return sha256_many(files, workers=config.HASH_WORKERS, hasher=_timed_sha256)
 
     def parse_meta(self, file_path: str) -> Dict[str, str] | None:
         name = Path(file_path).name
@@ -47,59 +234,416 @@ class Orchestrator:
         return {"employee_id": m.group("emp"), "period": m.group("ym")}
 
     def process_file(self, file_path: str):
+        done = self.submit_file(file_path)
+        if done is not None:
+            done.result()
+
+    def submit_file(self, file_path: str, checksum: str | None = None,
+                    seen: Any = _UNCHECKED) -> Future | None:
+        """
+        Runs the pre-upload steps inline and hands the upload to the retry
+        scheduler. Returns a Future that resolves once the file is archived
+        (or has failed), or None when the file was skipped up front.
+
+        `checksum` and `seen` (the dedup mark from a batched lookup) may be
+        passed in by `run_folder` to avoid re-hashing and a per-file cache read.
+        """
+        job = self.prepare_file(file_path, checksum, seen)
+        if job is None:
+            return None
+        return self._dispatch(job, self.retrier.submit(self._upload_one, job))
+
+    def prepare_file(self, file_path: str, checksum: str | None = None,
+                     seen: Any = _UNCHECKED) -> _Job | None:
+        """Hash, dedup, parse and lookup; the returned job holds the claims until dispatched and settled."""
+        job = self._prepare(file_path, checksum, seen)
+        return None if job is _CLAIMED else job
+
+    def _prepare(self, file_path: str, checksum: str | None, seen: Any) -> _Job | object | None:
+        """`prepare_file`, but returns `_CLAIMED` when another worker holds the upload claim."""
         filename = Path(file_path).name
         ctx = with_trace({"file": file_path})
         logger.info(f"🏁 Processing {filename} ...", **ctx)
 
-        checksum = sha256sum(file_path)
+        prechecked = seen is not _UNCHECKED
+        if checksum is None:
+            checksum = self.checksum(file_path)
+        # the claim token lets `resume` drop this run's inflight: key after a crash
+        self._journal(file_path, "hashed", checksum=checksum, claim=self._claim_token)
         dedup_key = f"checksum:{checksum}"
-        if self.cache.get(dedup_key):
+        if self._claim(checksum):
+            prechecked = False  # another worker just finished this content
+        try:
+            job = self._check(file_path, filename, checksum, dedup_key, ctx,
+                              seen if prechecked else self.cache.get(dedup_key))
+        except BaseException:
+            self._release(checksum)
+            raise
+        if job is None or job is _CLAIMED:
+            self._release(checksum)
+            if job is None:
+                self._journal(file_path, "skipped")
+        return job
+
+    def _dispatch(self, job: _Job, upload: Future) -> Future:
+        """Future of the file's outcome: True once archived, False if the upload failed for good."""
+        done = Future()
+        def finish(fut: Future):
+            try:
+                ok = self._finish(job, fut)
+            except BaseException as e:
+                done.set_exception(e)
+            else:
+                done.set_result(ok)
+        # archive on its own pool so it overlaps with the next uploads
+        upload.add_done_callback(lambda fut: self._archiver.submit(finish, fut))
+        return done
+
+    def _finish(self, job: _Job, upload: Future) -> bool:
+        """Marks and archives an uploaded file (or reports the failure); always drops the job's claims."""
+        try:
+            if upload.exception() is not None:
+                self._journal(job.file_path, "failed", error=str(upload.exception()))
+                self._upload_failed(upload, job.filename, job.ctx)
+                return False
+            # mark before archiving: a crash from here on must never re-upload
+            self.cache.set(job.dedup_key, "1")
+            self._journal(job.file_path, "uploaded", durable=True)
+            self._archive(job.file_path, job.filename, job.ctx, len(upload.attempts))
+            return True
+        finally:
+            self._drop_claims(job)
+
+    def _drop_claims(self, job: _Job):
+        self.cache.delete(job.claim_key)
+        self._release(job.checksum)
+
+    def _check(self, file_path: str, filename: str, checksum: str,
+               dedup_key: str, ctx: Dict[str, Any], seen: str | None) -> _Job | object | None:
+        if seen:
             inc("dedup_skipped_total")
             short_sum = checksum[:12]
             logger.info(f"⚠️  Duplicate skipped (checksum={short_sum}…)", **ctx)
-            return
+            self.notifier.record("duplicate", filename)
+            return None
 
         meta = self.parse_meta(file_path)
         if not meta:
             inc("parse_error_total")
             logger.error(f"❌ Invalid filename format: {filename}", **ctx)
-            return
+            self.notifier.record("failed", filename, "invalid filename format")
+            return None
 
-        emp = find_employee(self.employees, meta["employee_id"])
+        with timer(STAGE_SECONDS, stage="lookup"):
+            emp = self.employees.get(meta["employee_id"])
         if not emp:
             inc("employee_not_found_total")
             logger.error(f"❌ Employee not found: {meta['employee_id']}", **ctx)
-            return
+            self.notifier.record("failed", filename, f"employee not found: {meta['employee_id']}")
+            return None
 
-        from core.retry_handler import retry
-        def do_upload():
-            res = upload_payslip(emp["hibob_id"], file_path, self.fail_rate)
-            if res.get("status") != "ok":
-                raise RuntimeError(res.get("message", "upload failed"))
-            return res
+        claim_key = f"inflight:{checksum}"
+        if not self.cache.set_if_absent(claim_key, self._claim_token, ex=config.DEDUP_CLAIM_TTL):
+            inc("dedup_skipped_total")
+            logger.info(f"⚠️  Duplicate skipped (checksum={checksum[:12]}…, claimed by another worker)", **ctx)
+            self.notifier.record("duplicate", filename)
+            return _CLAIMED
 
-        try:
-            res = retry(do_upload, self.max_attempts, self.base_delay)
-        except Exception as e:
-            inc("upload_final_fail_total")
-            logger.error(f"❌ Upload failed for {filename}: {e}", **ctx)
-            slack_notify(f"❌ Upload failed for {filename}", error=str(e))
+        return _Job(file_path, filename, checksum, dedup_key, ctx, meta, emp["hibob_id"], claim_key)
+
+    def _upload_one(self, job: _Job) -> dict:
+        if self.throttle is not None:
+            delay = self.throttle.try_acquire(job.hibob_id)
+            if delay:
+                inc("upload_throttled_total")
+                raise RetryAfter(delay)
+        with timer(STAGE_SECONDS, stage="upload"):
+            res = self.client.upload_payslip(job.hibob_id, job.file_path)
+        _raise_for_upload(res)
+        return res
+
+    def _submit_batches(self, jobs: List[_Job]) -> List[Future]:
+        """
+        Uploads `jobs` in groups of `client.batch_size`, one request per group.
+        A group is retried as a whole on transport errors (and fails as a whole
+        once its attempts are used up); only payslips rejected or left out by
+        the throttle inside a successful batch fall back to individual retries.
+        """
+        uploads = []
+        size = max(1, getattr(self.client, "batch_size", 50))
+        for group in _chunks(jobs, size):
+            futures = [Future() for _ in group]
+            for f in futures:
+                f.attempts = []
+            batch = self.retrier.submit(self._upload_group, group)
+            batch.add_done_callback(lambda b, g=group, fs=futures: self._split_batch(b, g, fs))
+            uploads.extend(futures)
+        return uploads
+
+    def _upload_group(self, group: List[_Job]) -> List[dict | None]:
+        """One batch request; items whose employee is over its rate are left out (None)."""
+        admitted = list(range(len(group)))
+        if self.throttle is not None:
+            admitted, delay = self.throttle.try_acquire_batch([j.hibob_id for j in group])
+            if delay:
+                inc("upload_throttled_total")
+                raise RetryAfter(delay)
+            if not admitted:
+                return [None] * len(group)
+        with timer(STAGE_SECONDS, stage="upload_batch"):
+            results = self.client.upload_batch([(group[i].hibob_id, group[i].file_path) for i in admitted])
+        if all(r.get("status") != "ok" for r in results):
+            _raise_for_upload(results[0])
+        out = [None] * len(group)
+        for i, r in zip(admitted, results):
+            out[i] = r
+        return out
+
+    def _split_batch(self, batch: Future, group: List[_Job], futures: List[Future]):
+        error = batch.exception()
+        for fut in futures:
+            fut.attempts.extend(batch.attempts)
+            if error is not None:
+                fut.set_exception(error)  # the batch already used every attempt
+        if error is not None:
             return
+        for job, fut, res in zip(group, futures, batch.result()):
+            if res is not None and res.get("status") == "ok":
+                fut.set_result(res)
+            else:
+                _chain(self.retrier.submit(self._upload_one, job), fut)
+
+    def _journal(self, file_path: str, state: str, durable: bool = False, **fields):
+        if self.journal is not None:
+            self.journal.record(file_path, state, durable=durable, **fields)
 
-        archive_path = encrypt_copy(file_path, self.archive_dir)
-        self.cache.set(dedup_key, "1")
+    def _upload_failed(self, upload: Future, filename: str, ctx: Dict[str, Any]):
+        e = upload.exception()
+        inc("upload_final_fail_total")
+        logger.error(f"❌ Upload failed for {filename}: {e}", attempts=len(upload.attempts), **ctx)
+        self.notifier.record("failed", filename, str(e))
+
+    def _archive(self, file_path: str, filename: str, ctx: Dict[str, Any], attempts: int):
+        with timer(STAGE_SECONDS, stage="archive"):
+            archive_path = encrypt_copy(file_path, self.archive_dir, self.archive_mode, self.archive_key)
+        self._journal(file_path, "archived", archive=archive_path)
 
         inc("upload_success_total")
-        logger.info(f"✅ Uploaded {filename} → {archive_path}", **ctx)
-        slack_notify(f"✅ Uploaded {filename}", employee=meta["employee_id"], period=meta["period"])
-
-    def run_folder(self, folder: str):
-        p = Path(folder)
-        files = sorted([str(x) for x in p.glob("*.pdf")])
-        if not files:
-            logger.warning(f"⚠️  No PDF files found in {folder}")
-            return
-        for f in files:
-            self.process_file(f)
+        logger.info(f"✅ Uploaded {filename} → {archive_path}", attempts=attempts, **ctx)
+        self.notifier.record("uploaded", filename)
+
+    def _prefetch_marks(self, checksums: List[str], seen_in_run: set) -> List[Any]:
+        """
+        One batched dedup lookup. Content already met earlier in this run may
+        have finished since the lookup, so those files are re-checked when they run.
+        """
+        with timer(STAGE_SECONDS, stage="dedup"):
+            marks = self.cache.get_many(f"checksum:{c}" for c in checksums)
+        for i, c in enumerate(checksums):
+            digest = bytes.fromhex(c)
+            if digest in seen_in_run:
+                marks[i] = _UNCHECKED
+            seen_in_run.add(digest)
+        return marks
+
+    def _hash_stage(self, chunk: List[str], inflight: "_InFlight"):
+        digests = self.checksums(chunk)
+        # files that vanished or became unreadable since discovery drop out here
+        inflight.defer(chunk[i] for i, d in enumerate(digests) if not d)
+        kept = [i for i, d in enumerate(digests) if d]
+        if kept:
+            yield [chunk[i] for i in kept], [digests[i] for i in kept]
+
+    def _dedup_stage(self, item, seen_in_run: set, seen_lock: Lock, inflight: "_InFlight"):
+        """
+        One batched dedup lookup per chunk, then parse/lookup/claim per file.
+        Yields single jobs, or one list of jobs when the chunk goes out as
+        multi-file upload batches. Files claimed by another worker are deferred.
+        """
+        chunk, checksums = item
+        with seen_lock:
+            marks = self._prefetch_marks(checksums, seen_in_run)
+
+        def prepare(i: int) -> _Job | None:
+            job = self._prepare(chunk[i], checksums[i], marks[i])
+            if job is _CLAIMED:
+                inflight.defer([chunk[i]])
+                return None
+            return job
+
+        # repeats of content met earlier in the run wait on that file's claim,
+        # so they are prepared only once everything else was handed on
+        first = [i for i, m in enumerate(marks) if m is not _UNCHECKED]
+        repeats = [i for i, m in enumerate(marks) if m is _UNCHECKED]
+        jobs = (prepare(i) for i in first)
+        if self.upload_batch_threshold is not None and len(chunk) > self.upload_batch_threshold:
+            group = []
+            try:
+                group.extend(j for j in jobs if j is not None)
+            except BaseException:
+                # the pipeline carries on after a failure: don't leave repeats waiting on these claims
+                for job in group:
+                    self._drop_claims(job)
+                raise
+            if group:
+                yield group
+        else:
+            yield from (j for j in jobs if j is not None)
+        for i in repeats:
+            job = prepare(i)
+            if job is not None:
+                yield job
+
+    def _upload_stage(self, item: _Job | List[_Job], inflight: "_InFlight"):
+        """Hands uploads to the retry scheduler and moves on; they finish through `_dispatch`."""
+        jobs = item if isinstance(item, list) else [item]
+        inflight.acquire(len(jobs))
+        try:
+            uploads = self._submit_batches(jobs) if isinstance(item, list) else \
+                [self.retrier.submit(self._upload_one, item)]
+        except BaseException:
+            inflight.release(len(jobs))
+            for job in jobs:
+                self._drop_claims(job)
+            raise
+        for job, upload in zip(jobs, uploads):
+            inflight.track(self._dispatch(job, upload), job.file_path)
+
+    def run_folder(self, folder: str, files: Iterable[str] | None = None) -> List[str]:
+        """
+        Streams `files` (default: every PDF in `folder`, discovered lazily)
+        through the staged pipeline in chunks of `batch_size`: each chunk is
+        hashed and dedup-checked in one batch while earlier files are still
+        uploading or archiving. Queues are bounded (two chunks ahead of the
+        dedup stage, `batch_size` jobs ahead of upload), and the upload stage
+        blocks only while `batch_size` uploads are already in flight.
+        Returns the files that were not processed: uploads that failed for good,
+        files another worker held the claim for, and files unreadable at hash
+        time (watch mode retries them).
+        """
+        scan = files is None
+        if scan:
+            files = iter_payslips(folder)
+            if self.journal is not None:
+                self.journal.begin(folder)  # files not discovered before a crash are resumed by rescanning
+        seen_in_run = set()
+        seen_lock = Lock()
+        count = 0
+        def discover():
+            nonlocal count
+            for chunk in _chunks(files, self.batch_size):
+                count += len(chunk)
+                yield chunk
+
+        w = self.stage_workers
+        inflight = _InFlight(self.batch_size)
+        try:
+            Pipeline([
+                Stage("hash", lambda chunk: self._hash_stage(chunk, inflight), w["hash"], queue_size=2),
+                Stage("dedup", lambda item: self._dedup_stage(item, seen_in_run, seen_lock, inflight),
+                      w["dedup"], queue_size=2),
+                Stage("upload", lambda item: self._upload_stage(item, inflight), 1, queue_size=self.batch_size),
+            ]).run(discover())
+        finally:
+            inflight.wait()
+        self.notifier.flush()
+        self.cache.persist()
+        if self.journal is not None:
+            self.journal.reset(finished=[folder] if scan else ())
+        if not count:
+            if scan:
+                logger.warning(f"⚠️  No PDF files found in {folder}")
+            return []
+        if self.checksum_index is not None:
+            self.checksum_index.evict()
         metrics = snapshot()
-        logger.info(f"🧾 Run complete — metrics={metrics}")
\ No newline at end of file
+        logger.info(f"🧾 Run complete — metrics={metrics}")
+        return inflight.failed + inflight.deferred
+
+    def resume_pending(self) -> bool:
+        """
+        Resumes first if the journal describes an unfinished run. Call before
+        starting a new run: uploaded-but-unarchived files already carry their
+        dedup mark, so a plain run would skip them and never archive them.
+        """
+        if self.journal is None:
+            return False
+        self.journal.flush()
+        if not (RunJournal.unfinished(self.journal.path) or RunJournal.runs(self.journal.path)):
+            return False
+        logger.warning("unfinished_run_found", journal=self.journal.path)
+        self.resume()
+        return True
+
+    def resume(self):
+        """
+        Finishes what a crashed run left in the journal: uploaded-but-unarchived
+        files are only archived, files that never got past hashing go through
+        the normal pipeline again, and folders whose scan did not complete are
+        scanned again (the checksum index keeps that cheap; finished files are
+        dedup-skipped). Upload claims the crashed run still holds are dropped
+        first (only if they still carry its token).
+        """
+        if self.journal is None:
+            raise ValueError("resume requires a run journal")
+        self.journal.flush()
+        todo = RunJournal.unfinished(self.journal.path)
+        folders = RunJournal.runs(self.journal.path)
+        logger.info("resume_started", unfinished=len(todo), folders=folders)
+        archived = []
+        retry = []
+        for file_path, state in todo.items():
+            if state.get("claim"):
+                # the crashed run's upload claim would otherwise outlive it by DEDUP_CLAIM_TTL
+                self.cache.compare_and_delete(f"inflight:{state['checksum']}", state["claim"])
+            if not os.path.exists(file_path):
+                logger.error(f"❌ Journalled file is gone: {file_path}")
+                self._journal(file_path, "failed", error="file is gone")
+                continue
+            if state["state"] == "uploaded":
+                self.cache.set(f"checksum:{state['checksum']}", "1")
+                ctx = with_trace({"file": file_path})
+                archived.append(self._archiver.submit(self._archive, file_path, Path(file_path).name, ctx, 0))
+            else:
+                retry.append(file_path)
+        for fut in archived:
+            fut.result()
+        self.run_folder(self.journal.path, files=retry)
+        for folder in folders:
+            if os.path.isdir(folder):
+                self.run_folder(folder)
+            else:
+                logger.error(f"❌ Journalled folder is gone: {folder}")
+        self.journal.reset(finished=folders)
+
+    def run_distributed(self, folder: str, leases: LeaseManager, shard_index: int = 0, shard_count: int = 1):
+        """
+        Processes `folder` cooperatively with other nodes. Files of this node's
+        shard come first; every file is leased (by name) before it enters
+        `run_folder`, and files leased elsewhere are revisited on later passes
+        until they are released or their lease expires (work stealing). Files a
+        peer already finished are then skipped by the normal dedup check.
+        """
+        files = sorted(iter_payslips(folder),
+                       key=lambda f: shard_of(Path(f).name, shard_count) != shard_index)
+        passes = 0
+        with leases:
+            while files:
+                deferred = []
+                for chunk in _chunks(files, self.batch_size):
+                    leased = []
+                    for f in chunk:
+                        (leased if leases.try_acquire(Path(f).name) else deferred).append(f)
+                    if not leased:
+                        continue
+                    try:
+                        self.run_folder(folder, files=leased)
+                    finally:
+                        for f in leased:
+                            leases.release(Path(f).name)
+                files = deferred
+                if files:
+                    passes += 1
+                    inc("lease_contended_total", len(files))
+                    logger.info("lease_deferred", files=len(files), passes=passes, worker=leases.worker_id)
+                    time.sleep(leases.ttl / 3)
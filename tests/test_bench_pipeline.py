@@ -0,0 +1,50 @@
+"""
+Smoke test for tools.bench_pipeline (load generation + JSON report).
+"""
+import json
+import pytest
+from tools import bench_pipeline
+
+
+def test_bench_reports_every_stage(tmp_path, capsys):
+    """A tiny run emits throughput, p50/p99 and peak RSS for end-to-end and each stage."""
+    out = tmp_path / "bench.json"
+    bench_pipeline.main(["--files", "20", "--size-kb", "4", "--employees", "7", "--workers", "2",
+                         "--latency-ms", "0", "--workdir", str(tmp_path), "-o", str(out)])
+    report = json.loads(out.read_text())
+    assert report["end_to_end"]["files"] == 20
+    assert set(report["stages"]) == {"hash", "dedup", "lookup", "upload", "archive"}
+    for stage in report["stages"].values():
+        assert stage["ops"] == 20 and stage["p50_ms"] <= stage["p99_ms"]
+        assert stage["peak_rss_mb"] > 0
+
+
+def test_generated_names_are_unique_and_parseable(tmp_path):
+    """More files than employees roll over into earlier months, one file per employee-month."""
+    files = bench_pipeline.generate_payslips(str(tmp_path), 30, 16, employees=4)
+    names = [p.rsplit("/", 1)[1] for p in files]
+    assert len(set(names)) == 30
+    assert {"EMP000000_202512.pdf", "EMP000000_202511.pdf"} <= set(names)
+
+
+def test_bench_keeps_logging_and_cleans_claims(tmp_path):
+    """Logging is back on after a run, and dedup claims are not left in the cache."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from core.cache import Cache
+    from observibility.logger import logger
+    shared = Cache(None, client=fakeredis.FakeRedis(decode_responses=True))
+    args = bench_pipeline.parse_args(["--files", "5", "--size-kb", "1", "--employees", "5",
+                                      "--latency-ms", "0", "--workdir", str(tmp_path)])
+    bench_pipeline.bench_stages(bench_pipeline.generate_payslips(str(tmp_path), 5, 64, 5), str(tmp_path),
+                                bench_pipeline.EmployeeDirectory.from_mapping({}), shared, args, 320)
+    assert shared._r.keys("bench:inflight:*") == []
+    sinks = dict(logger._core.handlers)
+    bench_pipeline.run_bench(args)
+    assert dict(logger._core.handlers) == sinks
+    seen = []
+    handler = logger.add(seen.append, level="INFO")
+    try:
+        logger.info("still_logging")
+    finally:
+        logger.remove(handler)
+    assert seen
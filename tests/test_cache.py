@@ -1,7 +1,9 @@
 """
 Unit tests for core.cache module.
 """
-
+import time
+import pytest
+import redis
 from core.cache import Cache
 
 
@@ -16,4 +18,73 @@ def test_cache_incr():
     """Ensure incr() increments properly."""
     c = Cache(None)
     c.incr("counter")
-    assert c.get("counter") == 1 or c.get("counter") == "1"
\ No newline at end of file
+    assert c.get("counter") == 1 or c.get("counter") == "1"
+
+def test_cache_bulk_ops():
+    """get_many/set_many round-trip and preserve key order."""
+    c = Cache(None)
+    c.set_many({"a": "1", "b": "2"})
+    assert c.get_many(["b", "missing", "a"]) == ["2", None, "1"]
+
+
+def test_cache_set_if_absent():
+    """set_if_absent only succeeds for the first claimant until deleted."""
+    c = Cache(None)
+    assert c.set_if_absent("lock", "w1")
+    assert not c.set_if_absent("lock", "w2")
+    c.delete("lock")
+    assert c.set_if_absent("lock", "w2")
+
+
+def test_fallback_ttl_and_lru_bound():
+    """The in-memory fallback honours `ex` and evicts least recently used keys."""
+    c = Cache(None, max_entries=2)
+    c.set("short", "x", ex=0.05)
+    c.set("a", "1")
+    c.get("a")
+    c.set("b", "2")
+    assert c.get("short") is None  # evicted as the LRU entry
+    c.set("ttl", "y", ex=0.05)
+    time.sleep(0.06)
+    assert c.get("ttl") is None and c.get("b") == "2"
+
+
+def test_digest_keys_stored_compact():
+    """checksum:<hex> keys are held as raw 32-byte digests."""
+    c = Cache(None)
+    digest = "ab" * 32
+    c.set(f"checksum:{digest}", "1")
+    assert list(c._local._data) == [bytes.fromhex(digest)]
+    assert c._local.items("checksum:") == [(f"checksum:{digest}", "1")]
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Dedup state written with persist() is back after a restart; expired keys are dropped."""
+    path = str(tmp_path / "cache.json")
+    c = Cache(None, snapshot_path=path)
+    c.set(f"checksum:{'cd' * 32}", "1")
+    c.set("gone", "1", ex=0.01)
+    time.sleep(0.02)
+    c.persist()
+    again = Cache(None, snapshot_path=path)
+    assert again.get(f"checksum:{'cd' * 32}") == "1"
+    assert len(again._local) == 1
+
+
+def test_unreachable_redis_falls_back_and_reconnects(monkeypatch):
+    """A failed ping leaves no dead client; the next probe connects and syncs local dedup marks."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    server.connected = False
+    monkeypatch.setattr(redis.Redis, "from_url",
+                        lambda url, **kw: fakeredis.FakeRedis(server=server, decode_responses=True))
+    c = Cache("redis://example:6379/0", reconnect_interval=0)
+    assert c._r is None
+    c.set(f"checksum:{'ef' * 32}", "1")
+    server.connected = True
+    assert c.get("missing") is None
+    assert c._r is not None
+    assert c.get(f"checksum:{'ef' * 32}") == "1"
+    server.connected = False
+    c.set("k", "v")  # connection lost mid-run: served locally
+    assert c._r is None and c._local.get("k") == "v"
@@ -0,0 +1,35 @@
+"""
+Unit tests for middleware.checksum_util module.
+"""
+import hashlib
+from middleware import checksum_util
+from middleware.checksum_util import sha256_many, sha256sum
+
+
+def test_sha256sum_buffered_and_mmap(tmp_path, monkeypatch):
+    """Buffered and mmap paths agree with hashlib for multi-chunk files."""
+    data = bytes(range(256)) * 20_000
+    f = tmp_path / "big.pdf"
+    f.write_bytes(data)
+    expected = hashlib.sha256(data).hexdigest()
+    assert sha256sum(str(f)) == expected
+    monkeypatch.setattr(checksum_util, "MMAP_THRESHOLD", 1)
+    assert sha256sum(str(f)) == expected
+
+
+def test_sha256_many_preserves_order(tmp_path):
+    """Parallel batch hashing returns digests in input order."""
+    paths = []
+    for i in range(10):
+        f = tmp_path / f"f{i}.pdf"
+        f.write_bytes(str(i).encode())
+        paths.append(str(f))
+    assert sha256_many(paths, workers=4) == [sha256sum(p) for p in paths]
+
+
+def test_sha256_many_skips_missing_file(tmp_path):
+    """A path that vanished yields None; the rest of the batch is still hashed."""
+    f = tmp_path / "a.pdf"
+    f.write_bytes(b"a")
+    for workers in (1, 4):
+        assert sha256_many([str(f), str(tmp_path / "gone.pdf")], workers=workers) == [sha256sum(str(f)), None]
@@ -0,0 +1,84 @@
+"""
+Unit tests for middleware.checksum_index module.
+"""
+import os
+from middleware.checksum_index import ChecksumIndex
+from middleware.checksum_util import sha256sum
+from observibility.metrics import snapshot
+
+
+def counting_hasher(calls):
+    def hasher(path):
+        calls.append(path)
+        return sha256sum(path)
+    return hasher
+
+
+def test_unchanged_file_is_not_rehashed(tmp_path):
+    """Second lookup of an unchanged file is served from the index."""
+    f = tmp_path / "EMP001_202501.pdf"
+    f.write_bytes(b"pdf")
+    idx = ChecksumIndex(str(tmp_path / "idx.sqlite"))
+    calls = []
+    hits = snapshot().get("checksum_index_hit_total", 0)
+
+    first = idx.digest(str(f), counting_hasher(calls))
+    second = idx.digest(str(f), counting_hasher(calls))
+
+    assert first == second == sha256sum(str(f))
+    assert len(calls) == 1
+    assert snapshot()["checksum_index_hit_total"] == hits + 1
+
+
+def test_changed_file_is_rehashed_and_index_persists(tmp_path):
+    """A new mtime invalidates the entry; entries survive reopening."""
+    f = tmp_path / "EMP001_202501.pdf"
+    f.write_bytes(b"v1")
+    path = str(tmp_path / "idx.sqlite")
+    idx = ChecksumIndex(path)
+    idx.digest(str(f))
+    idx.close()
+
+    f.write_bytes(b"v2")
+    os.utime(f, ns=(1, 1))
+    calls = []
+    idx = ChecksumIndex(path)
+    assert idx.digest(str(f), counting_hasher(calls)) == sha256sum(str(f))
+    assert len(calls) == 1
+
+
+def test_evict_bounds_entries(tmp_path):
+    """Eviction keeps at most max_entries rows."""
+    idx = ChecksumIndex(str(tmp_path / "idx.sqlite"), max_entries=2)
+    for i in range(4):
+        f = tmp_path / f"f{i}.pdf"
+        f.write_bytes(bytes([i]))
+        idx.digest(str(f))
+    assert idx.evict() == 2
+
+
+def test_digest_many_matches_single(tmp_path):
+    """Batch digests line up with inputs and reuse cached entries."""
+    paths = []
+    for i in range(5):
+        f = tmp_path / f"f{i}.pdf"
+        f.write_bytes(bytes([i]) * (i * 1000))
+        paths.append(str(f))
+    idx = ChecksumIndex(str(tmp_path / "idx.sqlite"))
+    idx.digest(paths[0])
+    hashed = []
+
+    def hasher_many(batch):
+        hashed.extend(batch)
+        return [sha256sum(p) for p in batch]
+
+    assert idx.digest_many(paths, hasher_many) == [sha256sum(p) for p in paths]
+    assert hashed == paths[1:]
+
+
+def test_digest_many_skips_missing_file(tmp_path):
+    """A vanished path gives None and is not indexed; the others are."""
+    idx = ChecksumIndex(str(tmp_path / "idx.sqlite"))
+    f = tmp_path / "a.pdf"
+    f.write_bytes(b"a")
+    assert idx.digest_many([str(tmp_path / "gone.pdf"), str(f)]) == [None, sha256sum(str(f))]
@@ -0,0 +1,79 @@
+"""
+Unit tests for middleware.employee_directory module.
+"""
+import json
+import os
+from middleware.employee_directory import EmployeeDirectory
+
+
+def write_ndjson(path, records, mode="w"):
+    with open(path, mode) as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+
+def test_json_source_with_secondary_lookups(tmp_path):
+    """Object-keyed employees.json supports id, hibob_id and email lookups."""
+    p = tmp_path / "employees.json"
+    p.write_text(json.dumps({"EMP001": {"email": "A@x.test", "hibob_id": "HB001"}}))
+    d = EmployeeDirectory(str(p))
+    assert d.get("EMP001")["hibob_id"] == "HB001"
+    assert d.by_hibob_id("HB001")["email"] == "A@x.test"
+    assert d.by_email("a@x.test")["hibob_id"] == "HB001"
+    assert d.get("EMP999") is None
+
+
+def test_ndjson_appends_are_indexed_incrementally(tmp_path):
+    """Appending to an NDJSON source indexes only the new tail on reload."""
+    p = tmp_path / "employees.ndjson"
+    write_ndjson(p, [{"employee_id": f"EMP{i:03d}", "hibob_id": f"HB{i:03d}"} for i in range(100)])
+    d = EmployeeDirectory(str(p), reload_interval=0)
+    assert len(d) == 100
+    indexed = d._indexed
+
+    write_ndjson(p, [{"employee_id": "EMP100", "hibob_id": "HB100"}], mode="a")
+    os.utime(p, ns=(1, 1))
+    assert d.get("EMP100")["hibob_id"] == "HB100"
+    assert d._offsets["EMP100"] == indexed
+    assert d.by_hibob_id("HB050")["employee_id"] == "EMP050"
+
+
+def test_ndjson_rewrite_triggers_full_reindex(tmp_path):
+    """A rewritten source drops employees that disappeared."""
+    p = tmp_path / "employees.ndjson"
+    write_ndjson(p, [{"employee_id": "EMP001", "hibob_id": "HB001"}])
+    d = EmployeeDirectory(str(p), reload_interval=0)
+    tmp = tmp_path / "next.ndjson"
+    write_ndjson(tmp, [{"employee_id": "EMP002", "hibob_id": "HB002"}])
+    os.replace(tmp, p)
+    assert d.get("EMP001") is None
+    assert d.get("EMP002")["hibob_id"] == "HB002"
+
+
+def test_failed_reload_keeps_last_good_index(tmp_path):
+    """A half-written or briefly missing source is logged and counted; lookups keep working."""
+    from observibility.metrics import snapshot
+    p = tmp_path / "employees.json"
+    p.write_text(json.dumps({"EMP001": {"hibob_id": "HB001"}}))
+    d = EmployeeDirectory(str(p), reload_interval=0)
+    failed = snapshot().get("employee_reload_failed_total", 0)
+
+    p.write_text('{"EMP001": {"hibob_id": "HB0')  # export still being written
+    assert d.get("EMP001")["hibob_id"] == "HB001"
+    p.unlink()  # mid-replace
+    assert d.get("EMP001")["hibob_id"] == "HB001"
+    assert snapshot()["employee_reload_failed_total"] - failed == 2
+
+    p.write_text(json.dumps({"EMP002": {"hibob_id": "HB002"}}))
+    assert d.get("EMP002")["hibob_id"] == "HB002"
+
+
+def test_failed_ndjson_append_leaves_index_intact(tmp_path):
+    """A corrupt appended line does not half-apply the tail to the index."""
+    p = tmp_path / "employees.ndjson"
+    write_ndjson(p, [{"employee_id": "EMP001", "hibob_id": "HB001"}])
+    d = EmployeeDirectory(str(p), reload_interval=0)
+    with open(p, "a") as f:
+        f.write(json.dumps({"employee_id": "EMP002", "hibob_id": "HB002"}) + "\n{broken\n")
+    assert d.get("EMP002") is None
+    assert d.get("EMP001")["hibob_id"] == "HB001"
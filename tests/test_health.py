@@ -1,11 +1,97 @@
 """
 Basic sanity test for project entrypoint.
-Ensures main.py imports and CLI group runs without error.
+Ensures main.py imports without side effects and the serve daemon runs.
 """
 import importlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 def test_main_importable():
     """Ensure main.py loads successfully"""
     mod = importlib.import_module("main")
-    assert hasattr(mod, "cli")
\ No newline at end of file
+    assert hasattr(mod, "cli")
+
+
+def test_main_import_has_no_side_effects():
+    """Importing main loads neither .env, config, logging nor the pipeline."""
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('dotenv', 'loguru', 'redis', 'core.config', 'orchestrator') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="POSIX signals")
+def test_serve_processes_drop_on_sigusr1(tmp_path):
+    """The daemon stays up, picks up a new file as soon as it is signalled, and exits on SIGTERM."""
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (tmp_path / "employees.json").write_text(json.dumps({"EMP001": {"hibob_id": "H001"}}))
+    env = dict(os.environ, REDIS_URL="", EMPLOYEES_PATH=str(tmp_path / "employees.json"),
+               ARCHIVE_DIR=str(tmp_path / "archive"), CHECKSUM_INDEX_PATH="", RUN_JOURNAL_PATH="",
+               LISTENER_CHECKPOINT=str(tmp_path / "ckpt.json"), LOCAL_CACHE_SNAPSHOT="",
+               METRICS_PORT="0", METRICS_FILE="", MAX_QPS_PER_EMPLOYEE="0")
+    proc = subprocess.Popen([sys.executable, "main.py", "serve", "-i", str(inbox), "--interval", "60"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(1.5)  # first (empty) poll done, now waiting out the interval
+        drop = inbox / "EMP001_202501.pdf"
+        drop.write_bytes(b"%PDF-1.4 drop")  # just written: younger than the listener's min_age
+        proc.send_signal(signal.SIGUSR1)
+        deadline = time.time() + 10  # well under --interval
+        while not (tmp_path / "archive" / drop.name).exists() and time.time() < deadline:
+            time.sleep(0.05)
+        assert (tmp_path / "archive" / drop.name).exists()
+        assert proc.poll() is None
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="POSIX signals")
+def test_serve_survives_failed_poll(tmp_path, monkeypatch):
+    """A poll that raises is logged; its files are handed out again and serving goes on."""
+    import main
+    from core import config
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    drop = inbox / "EMP001_202501.pdf"
+    drop.write_bytes(b"%PDF-1.4 drop")
+    old = time.time() - 5
+    os.utime(drop, (old, old))
+
+    class FlakyOrchestrator:
+        client = None
+
+        def __init__(self):
+            self.polls = []
+
+        def resume_pending(self):
+            return False
+
+        def run_folder(self, folder, files):
+            self.polls.append([os.path.basename(p) for p in files])
+            if len(self.polls) == 1:
+                raise RuntimeError("employee directory unreadable")
+            os.kill(os.getpid(), signal.SIGTERM)  # handled by serve: finish and exit
+            return []
+
+    orch = FlakyOrchestrator()
+    monkeypatch.setattr(main, "build_orchestrator", lambda *a: orch)
+    monkeypatch.setattr(config, "LISTENER_CHECKPOINT", str(tmp_path / "ckpt.json"))
+    monkeypatch.setattr(config, "METRICS_PORT", 0)
+    monkeypatch.setattr(config, "METRICS_FILE", "")
+    handlers = {s: signal.getsignal(s) for s in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1)}
+    try:
+        main.cli.main(["serve", "-i", str(inbox), "--interval", "0.05"], standalone_mode=False)
+    finally:
+        for s, h in handlers.items():
+            signal.signal(s, h)
+    assert orch.polls == [[drop.name], [drop.name]]
@@ -0,0 +1,94 @@
+"""
+Tests for middleware.hibob_client against the local stub server.
+"""
+import pytest
+from core.cache import Cache
+from middleware.hibob_client import HiBobClient
+from orchestrator import Orchestrator
+from tools.hibob_stub_server import serve_in_background
+
+
+@pytest.fixture
+def stub():
+    server = serve_in_background()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_single_and_batch_upload(stub, tmp_path):
+    """Pooled client uploads one file and a multipart batch."""
+    files = []
+    for i in range(3):
+        f = tmp_path / f"EMP00{i}_202501.pdf"
+        f.write_bytes(b"pdf")
+        files.append(str(f))
+    client = HiBobClient(stub, pool_size=2)
+    assert client.upload_payslip("HB001", files[0])["status"] == "ok"
+    results = client.upload_batch([(f"HB00{i}", p) for i, p in enumerate(files)])
+    assert [r["hibob_id"] for r in results] == ["HB000", "HB001", "HB002"]
+
+
+class CountingClient(HiBobClient):
+    batches = 0
+
+    def upload_batch(self, items):
+        self.batches += 1
+        return super().upload_batch(items)
+
+
+def test_orchestrator_batch_path(stub, tmp_path):
+    """Folders above the threshold upload through batched requests."""
+    employees = {}
+    for i in range(6):
+        (tmp_path / f"EMP{i:03d}_202501.pdf").write_bytes(f"pdf-{i}".encode())
+        employees[f"EMP{i:03d}"] = {"hibob_id": f"HB{i:03d}"}
+
+    orch = Orchestrator(
+        employees=employees,
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=2,
+        base_delay=0.01,
+        client=CountingClient(stub, batch_size=4),
+        upload_batch_threshold=2,
+    )
+
+    orch.run_folder(str(tmp_path))
+    assert orch.client.batches == 2
+    assert len(list((tmp_path / "archive").glob("*.pdf"))) == 6
+
+
+@pytest.mark.parametrize("header", ["30", "http-date"])
+def test_rate_limit_retry_after_is_seconds(tmp_path, header):
+    """Retry-After (delta-seconds or HTTP date) reaches the orchestrator as a RetryAfter delay."""
+    import time
+    from email.utils import formatdate
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from threading import Thread
+    from core.retry_handler import RetryAfter
+    from orchestrator import _raise_for_upload
+    value = formatdate(time.time() + 30, usegmt=True) if header == "http-date" else header
+
+    class Limited(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(429)
+            self.send_header("Retry-After", value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Limited)
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        f = tmp_path / "EMP001_202501.pdf"
+        f.write_bytes(b"pdf")
+        res = HiBobClient(f"http://127.0.0.1:{server.server_address[1]}").upload_payslip("HB001", str(f))
+    finally:
+        server.shutdown()
+    assert 25 <= res["retry_after"] <= 30
+    with pytest.raises(RetryAfter):
+        _raise_for_upload(res)
@@ -0,0 +1,90 @@
+"""
+Unit tests for middleware.sftp_listener module.
+"""
+import os
+import time
+from threading import Event, Thread
+from middleware.sftp_listener import Checkpoint, iter_new_payslips, iter_payslips, poll_payslips
+
+
+def touch(path, mtime_ns):
+    path.write_bytes(b"pdf")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_iter_payslips_filters_pdfs(tmp_path):
+    """Only PDF files are streamed."""
+    touch(tmp_path / "EMP001_202501.pdf", 1)
+    (tmp_path / "notes.txt").write_text("x")
+    (tmp_path / "sub.pdf").mkdir()
+    assert [os.path.basename(p) for p in iter_payslips(str(tmp_path))] == ["EMP001_202501.pdf"]
+
+
+def test_checkpoint_yields_only_new_or_changed(tmp_path):
+    """After save(), the next pass yields only files past the high-water mark."""
+    ckpt_path = str(tmp_path / "ckpt.json")
+    folder = tmp_path / "in"
+    folder.mkdir()
+    touch(folder / "a.pdf", 1_000)
+    touch(folder / "b.pdf", 2_000)
+
+    ckpt = Checkpoint(ckpt_path)
+    assert sorted(os.path.basename(p) for p in iter_new_payslips(str(folder), ckpt)) == ["a.pdf", "b.pdf"]
+    ckpt.save()
+
+    touch(folder / "c.pdf", 2_000)  # same mtime as the mark, unseen name
+    touch(folder / "a.pdf", 3_000)  # modified
+    ckpt = Checkpoint(ckpt_path)
+    assert sorted(os.path.basename(p) for p in iter_new_payslips(str(folder), ckpt)) == ["a.pdf", "c.pdf"]
+    ckpt.save()
+    assert list(iter_new_payslips(str(folder), Checkpoint(ckpt_path))) == []
+
+
+def test_failed_files_stay_retryable(tmp_path):
+    """Files passed to retry_later() come back on the next passes until they succeed."""
+    ckpt_path = str(tmp_path / "ckpt.json")
+    folder = tmp_path / "in"
+    folder.mkdir()
+    touch(folder / "ok.pdf", 1_000)
+    touch(folder / "fail.pdf", 2_000)
+
+    ckpt = Checkpoint(ckpt_path)
+    seen = list(iter_new_payslips(str(folder), ckpt))
+    ckpt.retry_later([p for p in seen if p.endswith("fail.pdf")])
+    ckpt.save()
+
+    ckpt = Checkpoint(ckpt_path)  # survives a restart
+    assert [os.path.basename(p) for p in iter_new_payslips(str(folder), ckpt)] == ["fail.pdf"]
+    ckpt.save()  # processed fine this time
+    assert list(iter_new_payslips(str(folder), Checkpoint(ckpt_path))) == []
+
+
+def test_discard_hands_out_the_failed_pass_again(tmp_path):
+    """After discard(), save() keeps the previous mark, so the same files come back."""
+    touch(tmp_path / "a.pdf", 1_000)
+    ckpt = Checkpoint(str(tmp_path / "ckpt.json"))
+    assert len(list(iter_new_payslips(str(tmp_path), ckpt))) == 1
+    ckpt.discard()
+    ckpt.save()
+    assert [os.path.basename(p) for p in iter_new_payslips(str(tmp_path), Checkpoint(ckpt.path))] == ["a.pdf"]
+
+
+def test_poll_repolls_files_skipped_as_too_fresh(tmp_path):
+    """A file younger than min_age is picked up once it is old enough, not an interval later."""
+    folder = tmp_path / "in"
+    folder.mkdir()
+    (folder / "a.pdf").write_bytes(b"pdf")
+    stop, seen = Event(), []
+
+    def consume():
+        for files in poll_payslips(str(folder), Checkpoint(), interval=60, min_age=0.3, stop=stop):
+            seen.extend(files)
+            if seen:
+                stop.set()
+
+    t = Thread(target=consume, daemon=True)
+    start = time.monotonic()
+    t.start()
+    t.join(timeout=5)
+    assert [os.path.basename(p) for p in seen] == ["a.pdf"]
+    assert time.monotonic() - start < 5
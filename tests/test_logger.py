@@ -0,0 +1,44 @@
+"""
+Unit tests for observibility.logger module.
+"""
+import io
+import json
+from observibility import logger as logmod
+from observibility.logger import BatchedJsonSink, logger, with_trace
+
+
+class Level:
+    def __init__(self, no):
+        self.no = no
+
+
+def test_sample_filter_keeps_errors(monkeypatch):
+    """Sampling drops success-path events but never warnings or errors."""
+    monkeypatch.setattr(logmod, "SAMPLE_RATES", {"hibob_upload_ok": 0.0})
+    ok = {"message": "hibob_upload_ok", "function": "upload_payslip", "level": Level(20)}
+    err = {"message": "hibob_upload_ok", "function": "upload_payslip", "level": Level(40)}
+    other = {"message": "✅ Uploaded x.pdf", "function": "_archive", "level": Level(20)}
+    assert not logmod.sample_filter(ok)
+    assert logmod.sample_filter(err)
+    assert logmod.sample_filter(other)
+
+
+def test_batched_sink_writes_json_lines():
+    """Buffered records are written as JSON lines on flush."""
+    out = io.StringIO()
+    sink = BatchedJsonSink(out, batch_size=1000, interval=60)
+    handler = logger.add(sink, level="INFO")
+    try:
+        logger.info("batched_event", **with_trace({"file": "a.pdf"}))
+        assert out.getvalue() == ""
+        sink.flush()
+    finally:
+        logger.remove(handler)
+    line = json.loads(out.getvalue().splitlines()[-1])
+    assert line["event"] == "batched_event" and line["file"] == "a.pdf"
+
+
+def test_trace_ids_are_unique():
+    """Counter-based trace ids do not repeat."""
+    ids = {with_trace()["trace_id"] for _ in range(1000)}
+    assert len(ids) == 1000
@@ -0,0 +1,54 @@
+"""
+Unit tests for observibility.metrics module.
+"""
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from observibility import metrics
+
+
+def test_sharded_counters_are_exact_across_threads():
+    """Per-thread shards merge to the exact total."""
+    before = metrics.snapshot().get("test_shard_total", 0)
+
+    def work(_):
+        for _ in range(1000):
+            metrics.inc("test_shard_total")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(8)))
+    assert metrics.snapshot()["test_shard_total"] == before + 8000
+
+
+def test_histogram_exposition():
+    """timer() feeds cumulative Prometheus buckets, sum and count."""
+    metrics.observe("test_latency_seconds", 0.003, stage="hash")
+    with metrics.timer("test_latency_seconds", stage="hash"):
+        pass
+    text = metrics.render_prometheus()
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{stage="hash",le="0.005"} 2' in text
+    assert 'test_latency_seconds_count{stage="hash"} 2' in text
+
+
+def test_http_endpoint_and_metric_event():
+    """metric_event() samples show up on the /metrics endpoint."""
+    event = metrics.metric_event("test_event_total", region="eu")
+    assert event["labels"] == {"region": "eu"}
+    server = metrics.serve_http(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        server.shutdown()
+    assert 'test_event_total{region="eu"} 1' in body
+
+
+def test_exited_threads_fold_into_base_shard():
+    """Shards of finished threads are reclaimed without losing their counts."""
+    before = metrics.snapshot().get("test_retire_total", 0)
+    live = len(metrics._shards)
+    for _ in range(5):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: metrics.inc("test_retire_total"), range(40)))
+    assert len(metrics._shards) <= live
+    assert metrics.snapshot()["test_retire_total"] == before + 200
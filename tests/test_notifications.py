@@ -0,0 +1,39 @@
+"""
+Unit tests for middleware.notifications module.
+"""
+import time
+from middleware.notifications import NotificationAggregator
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, text, **ctx):
+        self.sent.append((text, ctx))
+
+
+def test_flush_collapses_events_into_one_summary():
+    """Many outcomes produce a single summary with counts and failures."""
+    rec = Recorder()
+    agg = NotificationAggregator(send=rec, window=60)
+    for i in range(5):
+        agg.record("uploaded", f"EMP00{i}_202501.pdf")
+    agg.record("failed", "EMP009_202501.pdf", "boom")
+    agg.flush()
+    assert len(rec.sent) == 1
+    text, ctx = rec.sent[0]
+    assert ctx["counts"] == {"uploaded": 5, "failed": 1}
+    assert ctx["failures"] == [{"file": "EMP009_202501.pdf", "error": "boom"}]
+    assert "5 uploaded" in text
+
+
+def test_window_flushes_in_background():
+    """A summary goes out after the window without an explicit flush."""
+    rec = Recorder()
+    agg = NotificationAggregator(send=rec, window=0.05)
+    agg.record("uploaded", "a.pdf")
+    deadline = time.time() + 2
+    while not rec.sent and time.time() < deadline:
+        time.sleep(0.01)
+    assert rec.sent and rec.sent[0][1]["counts"] == {"uploaded": 1}
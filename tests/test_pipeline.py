@@ -0,0 +1,63 @@
+"""
+Unit tests for core.pipeline (bounded staged pipeline).
+"""
+import threading
+import time
+import pytest
+from core.pipeline import Pipeline, Stage, parse_stage_workers
+from observibility.metrics import _gauges
+
+
+def test_items_flow_through_all_stages():
+    """Every item passes every stage; stages may fan out or drop items."""
+    out, lock = [], threading.Lock()
+    def sink(x):
+        with lock:
+            out.append(x)
+    Pipeline([
+        Stage("split", lambda chunk: iter(chunk), workers=2),
+        Stage("even", lambda x: [x] if x % 2 == 0 else [], workers=3),
+        Stage("sink", sink, workers=2),
+    ]).run([list(range(i, i + 5)) for i in range(0, 20, 5)])
+    assert sorted(out) == list(range(0, 20, 2))
+
+
+def test_bounded_queue_backpressures_source():
+    """A slow stage keeps the source at most queue_size items ahead."""
+    fed, ahead = [], []
+    processed = []
+    def slow(x):
+        ahead.append(len(fed) - len(processed))
+        time.sleep(0.01)
+        processed.append(x)
+    def source():
+        for i in range(20):
+            fed.append(i)
+            yield i
+    Pipeline([Stage("slow", slow, workers=1, queue_size=2)]).run(source())
+    assert max(ahead) <= 4  # queued + the item being handed over + the one in hand
+
+
+def test_first_error_is_raised_after_draining():
+    """A failing item does not stop the rest of the pipeline; run() re-raises afterwards."""
+    done = []
+    def maybe_fail(x):
+        if x == 3:
+            raise ValueError("boom")
+        yield x
+    with pytest.raises(ValueError, match="boom"):
+        Pipeline([Stage("check", maybe_fail), Stage("done", done.append)]).run(range(6))
+    assert sorted(done) == [0, 1, 2, 4, 5]
+
+
+def test_queue_depth_and_utilisation_gauges():
+    """Each stage publishes its queue depth and utilisation."""
+    Pipeline([Stage("gauged", lambda x: time.sleep(0.005))]).run(range(5))
+    assert _gauges[("pipeline_queue_depth", (("stage", "gauged"),))] == 0
+    assert 0 < _gauges[("pipeline_stage_utilisation", (("stage", "gauged"),))] <= 1
+
+
+def test_parse_stage_workers():
+    """STAGE_WORKERS spec parses into per-stage counts."""
+    assert parse_stage_workers("hash=2, upload=16") == {"hash": 2, "upload": 16}
+    assert parse_stage_workers("") == {}
@@ -0,0 +1,51 @@
+"""
+Unit tests for core.rate_limiter module.
+"""
+import pytest
+from core.cache import Cache
+from core.rate_limiter import RateLimiter, UploadThrottle
+from core.retry_handler import RetryAfter, RetryScheduler
+
+
+def test_sliding_window_limits_and_recovers():
+    """At most `rate` admissions per window; capacity returns as the window slides."""
+    rl = RateLimiter(Cache(None), rate=3)
+    t = 100.0
+    assert [rl.try_acquire("k", t) for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = rl.try_acquire("k", t)
+    assert 0 < wait <= 1.0
+    # half-way through the next window half of the previous count still weighs in
+    assert rl.try_acquire("k", 101.5) == 0.0
+    assert rl.try_acquire("k", 101.5) > 0
+
+
+def test_throttle_refunds_employee_slot_when_global_denies():
+    """A global rejection does not burn the employee's budget."""
+    cache = Cache(None)
+    throttle = UploadThrottle(cache, global_qps=1, per_employee_qps=1)
+    assert throttle.try_acquire("HB001") == 0.0
+    assert throttle.try_acquire("HB002") > 0
+    assert throttle.employee_limiter.try_acquire("HB002") == 0.0
+
+
+def test_retry_after_does_not_consume_attempts():
+    """RetryAfter defers the call without counting it as a failed attempt."""
+    calls = {"n": 0}
+
+    def fn():
+        calls["n"] += 1
+        if calls["n"] <= 3:
+            raise RetryAfter(0.01)
+        return "ok"
+
+    fut = RetryScheduler(attempts=1, base_delay=0.01).submit(fn)
+    assert fut.result(timeout=2) == "ok"
+    assert len(fut.attempts) == 1
+
+
+def test_slow_rate_keeps_counters_for_whole_window():
+    """Below 1 per window the widened window also sets the counter TTL; rate 0 is rejected."""
+    rl = RateLimiter(Cache(None), rate=0.2)
+    assert rl.window == 5.0 and rl._ttl == 10
+    with pytest.raises(ValueError):
+        RateLimiter(Cache(None), rate=0)
@@ -0,0 +1,49 @@
+"""
+Unit tests for core.retry_handler module.
+"""
+import asyncio
+import pytest
+from core.retry_handler import RetryScheduler, backoff_delay, retry_async
+
+
+def flaky(failures: int):
+    calls = {"n": 0}
+    def fn():
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            raise RuntimeError("transient")
+        return "ok"
+    return fn
+
+
+def test_backoff_delay_is_capped():
+    """Full jitter never exceeds the max backoff cap."""
+    assert all(0 <= backoff_delay(20, 1.0, 0.2) <= 0.2 for _ in range(100))
+
+
+def test_scheduler_retries_and_records_attempts():
+    """Failed attempts are re-queued and per-attempt latency is exposed."""
+    sched = RetryScheduler(attempts=3, base_delay=0.01, max_delay=0.02)
+    fut = sched.submit(flaky(2))
+    assert fut.result(timeout=2) == "ok"
+    assert [a["attempt"] for a in fut.attempts] == [1, 2, 3]
+    assert fut.attempts[-1]["error"] is None
+
+
+def test_scheduler_gives_up_after_max_attempts():
+    """The future carries the last error once attempts are exhausted."""
+    sched = RetryScheduler(attempts=2, base_delay=0.01)
+    fut = sched.submit(flaky(5))
+    with pytest.raises(RuntimeError):
+        fut.result(timeout=2)
+    assert len(fut.attempts) == 2
+
+
+def test_async_modes():
+    """Both retry_async and submit_async can be awaited."""
+    async def main():
+        sched = RetryScheduler(attempts=3, base_delay=0.01)
+        a = await sched.submit_async(flaky(1))
+        b = await retry_async(flaky(1), 3, 0.01)
+        return a, b
+    assert asyncio.run(main()) == ("ok", "ok")
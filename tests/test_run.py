@@ -2,9 +2,14 @@
 Integration test for Orchestrator.run_folder() with mock files.
 """
 import os
+import threading
+import time
+import pytest
 from orchestrator import Orchestrator
 from core.cache import Cache
+from middleware.employee_directory import EmployeeDirectory
 from core import config
+from middleware.checksum_util import sha256sum
 
 
 def test_run_folder(tmp_path):
@@ -22,4 +27,259 @@ def test_run_folder(tmp_path):
     )
 
     orch.run_folder(str(tmp_path))
-    assert os.path.exists(tmp_path / "archive" / "EMP001_202501.pdf")
\ No newline at end of file
+    assert os.path.exists(tmp_path / "archive" / "EMP001_202501.pdf")
+
+def test_run_folder_concurrent_dedup(tmp_path):
+    """Identical content racing across workers is uploaded exactly once"""
+    for i in range(8):
+        (tmp_path / f"EMP001_2025{i + 1:02d}.pdf").write_bytes(b"same-pdf")
+
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.1,
+        workers=4,
+    )
+
+    orch.run_folder(str(tmp_path))
+    assert len(list((tmp_path / "archive").glob("*.pdf"))) == 1
+
+
+class CountingCache(Cache):
+    def __init__(self):
+        super().__init__(None)
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+
+def test_run_folder_batches_dedup_lookup(tmp_path):
+    """Already-uploaded checksums are filtered by one batch lookup, not per-file gets"""
+    from middleware.checksum_util import sha256sum
+    done = tmp_path / "EMP001_202501.pdf"
+    done.write_bytes(b"uploaded-last-month")
+    (tmp_path / "EMP001_202502.pdf").write_bytes(b"new-pdf")
+
+    cache = CountingCache()
+    cache.set(f"checksum:{sha256sum(str(done))}", "1")
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=cache,
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.1,
+    )
+
+    orch.run_folder(str(tmp_path))
+    assert cache.gets == 0
+    assert [p.name for p in (tmp_path / "archive").glob("*.pdf")] == ["EMP001_202502.pdf"]
+
+
+def test_run_folder_streams_in_batches(tmp_path):
+    """Files supplied as a generator are processed across several small batches"""
+    for i in range(7):
+        (tmp_path / f"EMP001_2025{i + 1:02d}.pdf").write_bytes(f"pdf-{i}".encode())
+
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.1,
+        batch_size=3,
+    )
+
+    orch.run_folder(str(tmp_path), files=(str(p) for p in sorted(tmp_path.glob("*.pdf"))))
+    assert len(list((tmp_path / "archive").glob("*.pdf"))) == 7
+
+
+def test_run_folder_survives_vanished_file(tmp_path):
+    """A file removed between discovery and hashing does not sink its batch"""
+    for i in range(5):
+        (tmp_path / f"EMP001_2025{i + 1:02d}.pdf").write_bytes(f"pdf-{i}".encode())
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.1,
+    )
+    files = sorted(str(p) for p in tmp_path.glob("*.pdf")) + [str(tmp_path / "EMP001_202512.pdf")]
+    assert orch.run_folder(str(tmp_path), files=files) == [str(tmp_path / "EMP001_202512.pdf")]
+    assert len(list((tmp_path / "archive").glob("*.pdf"))) == 5
+
+
+class DownClient:
+    """HiBob outage: every batch request fails at the transport level."""
+    batch_size = 50
+
+    def __init__(self):
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    def upload_batch(self, items):
+        self.batch_calls += 1
+        return [{"status": "error", "message": "connection refused"} for _ in items]
+
+    def upload_payslip(self, hibob_id, file_path):
+        self.single_calls += 1
+        return {"status": "error", "message": "connection refused"}
+
+
+def test_failed_batch_is_not_retried_per_item(tmp_path):
+    """A batch that exhausted its attempts fails its payslips instead of retrying each one"""
+    for i in range(3):
+        (tmp_path / f"EMP001_2025{i + 1:02d}.pdf").write_bytes(f"pdf-{i}".encode())
+    client = DownClient()
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=2,
+        base_delay=0.01,
+        client=client,
+        upload_batch_threshold=1,
+    )
+    orch.run_folder(str(tmp_path))
+    assert (client.batch_calls, client.single_calls) == (2, 0)
+    assert not (tmp_path / "archive").exists()
+
+
+class RateLimitedOnceClient:
+    """Answers 429 (retry after 1 s) to the first upload of one file; records when each upload happens."""
+    batch_size = 50
+
+    def __init__(self, slow_name):
+        self.slow_name = slow_name
+        self.calls = []
+
+    def upload_payslip(self, hibob_id, file_path):
+        name = os.path.basename(file_path)
+        self.calls.append((name, time.monotonic()))
+        if name == self.slow_name and len([c for c in self.calls if c[0] == name]) == 1:
+            return {"status": "error", "http_status": 429, "retry_after": 1.0}
+        return {"status": "ok", "hibob_id": hibob_id}
+
+
+def test_backoff_does_not_stall_other_files(tmp_path):
+    """A file waiting out its retry delay does not hold up the files behind it"""
+    files = []
+    for i in range(5):
+        p = tmp_path / f"EMP001_2025{i + 1:02d}.pdf"
+        p.write_bytes(f"pdf-{i}".encode())
+        files.append(str(p))
+    client = RateLimitedOnceClient("EMP001_202501.pdf")
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=2,
+        base_delay=0.01,
+        client=client,
+    )
+    start = time.monotonic()
+    orch.run_folder(str(tmp_path), files=files)
+    others = [t - start for name, t in client.calls if name != "EMP001_202501.pdf"]
+    assert len(others) == 4 and max(others) < 0.5
+    assert len(list((tmp_path / "archive").glob("*.pdf"))) == 5
+
+
+class FailingDirectory(EmployeeDirectory):
+    def get(self, employee_id):
+        if employee_id == "EMPBAD":
+            raise RuntimeError("lookup backend down")
+        return super().get(employee_id)
+
+
+def test_failed_batch_preparation_releases_claims(tmp_path):
+    """A lookup error while building an upload batch frees the claims already taken"""
+    a = tmp_path / "EMP001_202501.pdf"
+    bad = tmp_path / "EMPBAD_202501.pdf"
+    again = tmp_path / "EMP001_202502.pdf"
+    a.write_bytes(b"same")
+    bad.write_bytes(b"other")
+    again.write_bytes(b"same")
+    orch = Orchestrator(
+        employees=FailingDirectory.from_mapping({"EMP001": {"hibob_id": "H001"}}),
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.01,
+        batch_size=2,
+        upload_batch_threshold=1,
+    )
+    errors = []
+    def run():
+        try:
+            orch.run_folder(str(tmp_path), files=[str(a), str(bad), str(again)])
+        except RuntimeError as e:
+            errors.append(e)
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    t.join(timeout=10)
+    assert not t.is_alive(), "run_folder hung on a leaked claim"
+    assert [str(e) for e in errors] == ["lookup backend down"]
+    assert [p.name for p in (tmp_path / "archive").glob("*.pdf")] == ["EMP001_202502.pdf"]
+
+
+def test_run_folder_reports_failed_uploads(tmp_path):
+    """Files whose upload failed for good are returned so watch mode can retry them"""
+    (tmp_path / "EMP001_202501.pdf").write_bytes(b"a")
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=Cache(None),
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.01,
+        client=DownClient(),
+    )
+    assert orch.run_folder(str(tmp_path)) == [str(tmp_path / "EMP001_202501.pdf")]
+
+
+def test_run_folder_reports_files_claimed_elsewhere(tmp_path):
+    """A file skipped over another worker's (e.g. a crashed one's stale) claim is returned, not lost"""
+    f = tmp_path / "EMP001_202501.pdf"
+    f.write_bytes(b"a")
+    cache = Cache(None)
+    claim = f"inflight:{sha256sum(str(f))}"
+    cache.set(claim, "crashed-host:1", ex=300)
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=cache,
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.01,
+    )
+    assert orch.run_folder(str(tmp_path)) == [str(f)]
+    cache.delete(claim)  # expired
+    assert orch.run_folder(str(tmp_path), files=[str(f)]) == []
+    assert (tmp_path / "archive" / f.name).exists()
+
+
+@pytest.mark.parametrize("mode,key", [("aesgcm", None), ("zip", None)])
+def test_bad_archive_settings_fail_before_any_upload(tmp_path, mode, key):
+    """Archive settings encrypt_copy would reject stop the orchestrator from being built"""
+    with pytest.raises(ValueError):
+        Orchestrator(
+            employees={"EMP001": {"hibob_id": "H001"}},
+            cache=Cache(None),
+            archive_dir=str(tmp_path / "archive"),
+            fail_rate=0.0,
+            max_attempts=1,
+            base_delay=0.01,
+            archive_mode=mode,
+            archive_key=key,
+        )
@@ -0,0 +1,170 @@
+"""
+Tests for core.run_journal and Orchestrator.resume().
+"""
+import pytest
+from core.cache import Cache
+from core.run_journal import RunJournal
+from middleware.checksum_util import sha256sum
+from orchestrator import Orchestrator
+
+
+class CountingClient:
+    batch_size = 50
+
+    def __init__(self):
+        self.uploads = []
+
+    def upload_payslip(self, hibob_id, file_path):
+        self.uploads.append(file_path)
+        return {"status": "ok", "hibob_id": hibob_id}
+
+
+def test_replay_folds_states_and_ignores_torn_tail(tmp_path):
+    """Replay keeps the last state per file and stops at a torn line."""
+    path = str(tmp_path / "journal.jsonl")
+    j = RunJournal(path)
+    j.record("a.pdf", "hashed", checksum="aa")
+    j.record("a.pdf", "uploaded", durable=True)
+    j.record("b.pdf", "hashed", checksum="bb")
+    j.record("b.pdf", "archived")
+    j.close()
+    with open(path, "a") as f:
+        f.write('{"file": "c.pdf", "sta')
+    state = RunJournal.replay(path)
+    assert state["a.pdf"]["state"] == "uploaded" and state["a.pdf"]["checksum"] == "aa"
+    assert set(RunJournal.unfinished(path)) == {"a.pdf"}
+
+
+def test_resume_archives_uploaded_and_reprocesses_hashed(tmp_path):
+    """Uploaded files are only archived; hashed-only files are uploaded."""
+    uploaded = tmp_path / "EMP001_202501.pdf"
+    uploaded.write_bytes(b"uploaded-before-crash")
+    hashed = tmp_path / "EMP001_202502.pdf"
+    hashed.write_bytes(b"hashed-before-crash")
+    path = str(tmp_path / "journal.jsonl")
+    j = RunJournal(path)
+    j.record(str(uploaded), "hashed", checksum=sha256sum(str(uploaded)))
+    j.record(str(uploaded), "uploaded", durable=True)
+    j.record(str(hashed), "hashed", checksum=sha256sum(str(hashed)))
+    j.close()
+
+    client = CountingClient()
+    cache = Cache(None)
+    orch = Orchestrator(
+        employees={"EMP001": {"hibob_id": "H001"}},
+        cache=cache,
+        archive_dir=str(tmp_path / "archive"),
+        fail_rate=0.0,
+        max_attempts=1,
+        base_delay=0.1,
+        client=client,
+        journal=RunJournal(path),
+    )
+    orch.resume()
+
+    assert client.uploads == [str(hashed)]
+    assert sorted(p.name for p in (tmp_path / "archive").glob("*.pdf")) == [uploaded.name, hashed.name]
+    assert cache.get(f"checksum:{sha256sum(str(uploaded))}") == "1"
+    assert RunJournal.replay(path) == {}
+
+
+def test_resume_takes_over_claims_of_crashed_run(tmp_path):
+    """A crashed run's inflight: claim does not make resume skip (and lose) its file."""
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = Cache(None, client=fakeredis.FakeRedis(decode_responses=True))
+    f = tmp_path / "EMP001_202501.pdf"
+    f.write_bytes(b"in-flight-at-crash")
+    digest = sha256sum(str(f))
+    cache.set(f"inflight:{digest}", "crashed-host:123", ex=300)
+    path = str(tmp_path / "journal.jsonl")
+    j = RunJournal(path)
+    j.record(str(f), "hashed", checksum=digest, claim="crashed-host:123")
+    j.close()
+
+    client = CountingClient()
+    Orchestrator(employees={"EMP001": {"hibob_id": "H001"}}, cache=cache,
+                 archive_dir=str(tmp_path / "archive"), fail_rate=0.0, max_attempts=1,
+                 base_delay=0.1, client=client, journal=RunJournal(path)).resume()
+    assert client.uploads == [str(f)]
+    assert cache.get(f"checksum:{digest}") == "1"
+    assert (tmp_path / "archive" / f.name).exists()
+
+
+def make_orch(tmp_path, cache, client=None):
+    return Orchestrator(employees={"EMP001": {"hibob_id": "H001"}}, cache=cache,
+                        archive_dir=str(tmp_path / "archive"), fail_rate=0.0, max_attempts=1,
+                        base_delay=0.1, client=client or CountingClient(),
+                        journal=RunJournal(str(tmp_path / "journal.jsonl")))
+
+
+def test_claim_contention_is_not_journalled_as_final(tmp_path):
+    """A file skipped by run_folder because another live worker holds its claim stays resumable."""
+    cache = Cache(None)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    f = inbox / "EMP001_202501.pdf"
+    f.write_bytes(b"claimed-elsewhere")
+    (inbox / "EMP001_202502.pdf").write_bytes(b"free")
+    cache.set(f"inflight:{sha256sum(str(f))}", "other-node:1", ex=300)
+    make_orch(tmp_path, cache).run_folder(str(inbox))
+    path = str(tmp_path / "journal.jsonl")
+    assert list(RunJournal.unfinished(path)) == [str(f)]
+    assert RunJournal.runs(path) == []
+
+
+def test_reset_keeps_unfinished_entries(tmp_path):
+    """reset() drops finished files and finished folders only."""
+    path = str(tmp_path / "journal.jsonl")
+    j = RunJournal(path)
+    j.begin("in")
+    j.begin("other")
+    j.record("a.pdf", "hashed", checksum="aa")
+    j.record("a.pdf", "uploaded", durable=True)
+    j.record("b.pdf", "archived")
+    j.reset(finished=["in"])
+    j.record("c.pdf", "hashed", checksum="cc")
+    j.close()
+    assert RunJournal.runs(path) == ["other"]
+    state = RunJournal.unfinished(path)
+    assert sorted(state) == ["a.pdf", "c.pdf"] and state["a.pdf"]["checksum"] == "aa"
+
+
+def test_new_run_resumes_uploaded_but_unarchived_first(tmp_path):
+    """A file uploaded (and dedup-marked) before a crash is archived, not skipped as a duplicate."""
+    cache = Cache(None)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    uploaded = inbox / "EMP001_202501.pdf"
+    uploaded.write_bytes(b"uploaded-before-crash")
+    (inbox / "EMP001_202502.pdf").write_bytes(b"new")
+    digest = sha256sum(str(uploaded))
+    cache.set(f"checksum:{digest}", "1")
+    j = RunJournal(str(tmp_path / "journal.jsonl"))
+    j.begin(str(inbox))
+    j.record(str(uploaded), "hashed", checksum=digest)
+    j.record(str(uploaded), "uploaded", durable=True)
+    j.close()
+
+    orch = make_orch(tmp_path, cache)
+    assert orch.resume_pending()
+    orch.run_folder(str(inbox))
+    assert sorted(p.name for p in (tmp_path / "archive").glob("*.pdf")) == ["EMP001_202501.pdf", "EMP001_202502.pdf"]
+    assert not orch.resume_pending()
+
+
+def test_resume_rescans_the_interrupted_folder(tmp_path):
+    """Files the crashed run never reached are processed too, not just the journalled ones."""
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    for n in range(1, 6):
+        (inbox / f"EMP001_20250{n}.pdf").write_bytes(f"payslip-{n}".encode())
+    j = RunJournal(str(tmp_path / "journal.jsonl"))
+    j.begin(str(inbox))
+    j.record(str(inbox / "EMP001_202501.pdf"), "hashed", checksum=sha256sum(str(inbox / "EMP001_202501.pdf")))
+    j.close()
+
+    client = CountingClient()
+    make_orch(tmp_path, Cache(None), client).resume()
+    assert len(client.uploads) == 5
+    assert len(list((tmp_path / "archive").glob("*.pdf"))) == 5
+    assert RunJournal.runs(str(tmp_path / "journal.jsonl")) == []
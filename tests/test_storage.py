@@ -0,0 +1,44 @@
+"""
+Unit tests for middleware.storage_mock module.
+"""
+import os
+import pytest
+from middleware.storage_mock import decrypt_stream, encrypt_copy, encrypt_stream
+
+KEY = bytes(range(32))
+
+
+@pytest.mark.parametrize("mode", ["copy", "link"])
+def test_passthrough_modes(tmp_path, mode):
+    """copy and link archive byte-identical files."""
+    src = tmp_path / "EMP001_202501.pdf"
+    src.write_bytes(b"%PDF" * 1000)
+    out = encrypt_copy(str(src), str(tmp_path / "archive"), mode=mode)
+    assert open(out, "rb").read() == src.read_bytes()
+
+
+def test_aesgcm_roundtrip_across_chunks(tmp_path):
+    """Streaming encryption decrypts back to the original, across chunk boundaries."""
+    pytest.importorskip("cryptography")
+    src = tmp_path / "in.pdf"
+    data = os.urandom(10_000)
+    src.write_bytes(data)
+    enc, dec = tmp_path / "in.enc", tmp_path / "out.pdf"
+    encrypt_stream(str(src), str(enc), KEY, chunk_size=4096)
+    assert data not in enc.read_bytes()
+    decrypt_stream(str(enc), str(dec), KEY)
+    assert dec.read_bytes() == data
+
+
+def test_aesgcm_rejects_truncation(tmp_path):
+    """Dropping the final record fails authentication."""
+    pytest.importorskip("cryptography")
+    from cryptography.exceptions import InvalidTag
+    src = tmp_path / "in.pdf"
+    src.write_bytes(os.urandom(10_000))
+    enc = tmp_path / "in.enc"
+    encrypt_stream(str(src), str(enc), KEY, chunk_size=4096)
+    last_record = 10_000 - 2 * 4096 + 16
+    enc.write_bytes(enc.read_bytes()[:-last_record])
+    with pytest.raises(InvalidTag):
+        decrypt_stream(str(enc), str(tmp_path / "out.pdf"), KEY)
@@ -0,0 +1,87 @@
+"""
+Unit tests for core.work_lease (multi-node leasing) and Orchestrator.run_distributed().
+"""
+import os
+import threading
+import time
+import pytest
+from core.cache import Cache
+from core.work_lease import LeaseManager, shard_of
+from middleware.hibob_api_mock import MockHiBobClient
+from observibility.metrics import snapshot
+from orchestrator import Orchestrator
+
+
+def test_lease_is_exclusive_and_owner_released():
+    """A leased item cannot be taken by another worker, and only its owner frees it."""
+    cache = Cache(None)
+    a, b = LeaseManager(cache, "a"), LeaseManager(cache, "b")
+    assert a.try_acquire("EMP001_202501.pdf")
+    assert not b.try_acquire("EMP001_202501.pdf")
+    b.release("EMP001_202501.pdf")
+    assert not b.try_acquire("EMP001_202501.pdf")
+    a.release("EMP001_202501.pdf")
+    assert b.try_acquire("EMP001_202501.pdf")
+
+
+def test_expired_lease_is_stolen_and_not_renewed():
+    """When a lease expires another worker takes it over; the old owner's heartbeat drops it."""
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = Cache(None, client=fakeredis.FakeRedis(decode_responses=True))
+    a, b = LeaseManager(cache, "a", ttl=1), LeaseManager(cache, "b", ttl=30)
+    assert a.try_acquire("f.pdf")
+    time.sleep(1.1)
+    assert b.try_acquire("f.pdf")
+    a.renew()
+    assert a.held() == []
+    assert cache.get("lease:f.pdf") == "b"
+
+
+def test_shards_are_stable_and_in_range():
+    """crc32 sharding assigns the same file to the same shard on every node."""
+    names = [f"EMP{i:03d}_202501.pdf" for i in range(50)]
+    shards = [shard_of(n, 3) for n in names]
+    assert shards == [shard_of(n, 3) for n in names]
+    assert set(shards) == {0, 1, 2}
+
+
+class CountingClient(MockHiBobClient):
+    def __init__(self, uploads, lock):
+        super().__init__(latency=0.02)
+        self.uploads, self.lock = uploads, lock
+
+    def upload_payslip(self, hibob_id, file_path):
+        with self.lock:
+            self.uploads.append(os.path.basename(file_path))
+        return super().upload_payslip(hibob_id, file_path)
+
+
+def test_concurrent_nodes_share_folder_and_steal_expired_lease(tmp_path):
+    """Two nodes running at once upload every file exactly once, including one a dead node had leased."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    for i in range(12):
+        (tmp_path / f"EMP001_2025{i % 12 + 1:02d}.pdf").write_bytes(f"pdf-{i}".encode())
+    dead = Cache(None, client=fakeredis.FakeRedis(server=server, decode_responses=True))
+    dead.set("lease:EMP001_202501.pdf", "dead-node", ex=1)
+    uploads, lock = [], threading.Lock()
+    contended = snapshot().get("lease_contended_total", 0)
+
+    def node(name, shard):
+        cache = Cache(None, client=fakeredis.FakeRedis(server=server, decode_responses=True))
+        orch = Orchestrator(employees={"EMP001": {"hibob_id": "H001"}}, cache=cache,
+                            archive_dir=str(tmp_path / f"archive-{name}"), fail_rate=0.0,
+                            max_attempts=1, base_delay=0.1, batch_size=2,
+                            client=CountingClient(uploads, lock))
+        orch.run_distributed(str(tmp_path), LeaseManager(cache, name, ttl=1), shard, 2)
+
+    threads = [threading.Thread(target=node, args=(n, i)) for i, n in enumerate("ab")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    assert sorted(uploads) == sorted(p.name for p in tmp_path.glob("*.pdf"))
+    archived = [p.name for d in tmp_path.glob("archive-*") for p in d.glob("*.pdf")]
+    assert sorted(archived) == sorted(uploads)
+    assert dead.get("lease:EMP001_202501.pdf") is None
+    assert snapshot()["lease_contended_total"] > contended  # the dead node's file had to wait for expiry
@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from middleware.storage_mock import ARCHIVE_MODES, AESGCM, encrypt_copy
+
+"""
+Benchmark for the archive stage.
+Writes N synthetic payslips of a given size and reports MB/s for each
+archive mode (copy / link / aesgcm) as JSON.
+
+Usage:
+  python -m tools.bench_archive --files 200 --size-kb 2048
+"""
+
+def bench_mode(mode: str, files: list, size_bytes: int, key: bytes | None) -> dict:
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(files[0])) as dst:
+        start = time.perf_counter()
+        for f in files:
+            encrypt_copy(f, dst, mode=mode, key=key)
+        elapsed = time.perf_counter() - start
+    total_mb = size_bytes * len(files) / (1 << 20)
+    return {"mode": mode, "files": len(files), "seconds": round(elapsed, 4),
+            "mb_per_s": round(total_mb / elapsed, 1) if elapsed else None}
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark archive modes (MB/s)")
+    ap.add_argument("--files", type=int, default=100)
+    ap.add_argument("--size-kb", type=int, default=1024)
+    args = ap.parse_args()
+
+    from observibility.logger import logger
+    logger.disable("")  # keep per-file archive logs out of the measurement; sinks stay as they are
+    try:
+        results = run_modes(args.files, args.size_kb * 1024)
+    finally:
+        logger.enable("")
+    print(json.dumps({"size_kb": args.size_kb, "results": results}, indent=2))
+
+def run_modes(count: int, size: int) -> list:
+    with tempfile.TemporaryDirectory() as src_dir:
+        files = []
+        for i in range(count):
+            p = os.path.join(src_dir, f"EMP{i:06d}_202501.pdf")
+            with open(p, "wb") as f:
+                f.write(os.urandom(size))
+            files.append(p)
+        results = []
+        for mode in ARCHIVE_MODES:
+            if mode == "aesgcm" and AESGCM is None:
+                results.append({"mode": mode, "skipped": "cryptography not installed"})
+                continue
+            key = os.urandom(32) if mode == "aesgcm" else None
+            results.append(bench_mode(mode, files, size, key))
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from core.cache import Cache
+from middleware.checksum_util import sha256sum
+from middleware.employee_directory import EmployeeDirectory
+from middleware.hibob_api_mock import MockHiBobClient
+from middleware.storage_mock import encrypt_copy, load_key
+from observibility.metrics import histograms
+from orchestrator import Orchestrator
+
+"""
+Load generator and benchmark for the whole pipeline.
+
+Generates N synthetic payslips (`--size-kb` each) and an NDJSON employee
+directory of `--employees` records, then measures:
+- `end_to_end`: `Orchestrator.run_folder` over the generated folder, with
+  in-pipeline stage latencies read back from `stage_duration_seconds`
+  (bucket upper bounds, so p50/p99 are coarse there).
+- `stages`: hash, dedup, lookup, upload (mock client with `--latency-ms`)
+  and archive, each timed per operation in isolation.
+
+Every section reports ops/s, p50/p99 latency (ms) and the process peak RSS
+(MiB) reached so far, as JSON — diff two outputs to spot regressions.
+
+Usage:
+  python -m tools.bench_pipeline --files 2000 --size-kb 256 --employees 50000 --workers 8
+  python -m tools.bench_pipeline --files 500 --latency-ms 40 --output bench.json
+"""
+
+def generate_payslips(folder: str, n: int, size_bytes: int, employees: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(n):
+        period = i // employees  # one payslip per employee per month, walking back from 2025-12
+        name = f"EMP{i % employees:06d}_{2025 - period // 12:04d}{12 - period % 12:02d}.pdf"
+        p = os.path.join(folder, name)
+        with open(p, "wb") as f:
+            f.write(b"%PDF-1.4\n" + rnd.randbytes(max(size_bytes - 9, 0)))
+        paths.append(p)
+    return paths
+
+def generate_directory(path: str, n: int) -> str:
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"employee_id": f"EMP{i:06d}", "hibob_id": f"HB{i:06d}",
+                                "email": f"emp{i}@example.com"}) + "\n")
+    return path
+
+def peak_rss_mb() -> float:
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+def summarize(latencies: List[float], elapsed: float, nbytes: int = 0) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    def pct(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3) if ordered else None
+    out = {"ops": len(ordered), "seconds": round(elapsed, 4),
+           "ops_per_s": round(len(ordered) / elapsed, 1) if elapsed else None,
+           "p50_ms": pct(0.50), "p99_ms": pct(0.99), "peak_rss_mb": peak_rss_mb()}
+    if nbytes:
+        out["mb_per_s"] = round(nbytes / (1 << 20) / elapsed, 1) if elapsed else None
+    return out
+
+def timed(fn: Callable, args: List, workers: int = 1):
+    def one(a):
+        start = time.perf_counter()
+        fn(a)
+        return time.perf_counter() - start
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(one, args))
+    else:
+        latencies = [one(a) for a in args]
+    return latencies, time.perf_counter() - start
+
+def bucket_quantile(buckets: Dict[float, int], q: float) -> float | None:
+    total = max(buckets.values(), default=0)
+    for le, cumulative in buckets.items():
+        if total and cumulative >= q * total:
+            return le if le != float("inf") else None  # beyond the last bucket: unknown
+    return None
+
+def stage_histograms(before: dict, after: dict) -> dict:
+    out = {}
+    for series, h in after.items():
+        if not series.startswith("stage_duration_seconds"):
+            continue
+        prev = before.get(series, {"buckets": {}, "count": 0})
+        delta = {le: c - prev["buckets"].get(le, 0) for le, c in h["buckets"].items()}
+        if h["count"] - prev["count"]:
+            stage = series.split('"')[1]
+            p50, p99 = bucket_quantile(delta, 0.50), bucket_quantile(delta, 0.99)
+            out[stage] = {"count": h["count"] - prev["count"],
+                          "p50_ms_le": p50 and p50 * 1000, "p99_ms_le": p99 and p99 * 1000}
+    return out
+
+def bench_end_to_end(files: List[str], folder: str, directory: EmployeeDirectory, cache: Cache,
+                     args, nbytes: int) -> dict:
+    orch = Orchestrator(employees=directory, cache=cache, archive_dir=os.path.join(folder, "archive-e2e"),
+                        fail_rate=0.0, max_attempts=3, base_delay=0.01, workers=args.workers,
+                        batch_size=args.batch_size, archive_mode=args.archive_mode,
+                        archive_key=load_key(args.archive_key),
+                        client=MockHiBobClient(latency=args.latency_ms / 1000))
+    before = histograms()
+    start = time.perf_counter()
+    orch.run_folder(folder, files=files)
+    elapsed = time.perf_counter() - start
+    return {"files": len(files), "seconds": round(elapsed, 4),
+            "files_per_s": round(len(files) / elapsed, 1) if elapsed else None,
+            "mb_per_s": round(nbytes / (1 << 20) / elapsed, 1) if elapsed else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stage_histograms(before, histograms())}
+
+def bench_stages(files: List[str], folder: str, directory: EmployeeDirectory, cache: Cache,
+                 args, nbytes: int) -> dict:
+    stages = {}
+    lat, el = timed(sha256sum, files)
+    stages["hash"] = summarize(lat, el, nbytes)
+    digests = [sha256sum(f) for f in files]
+
+    def dedup(digest):
+        if cache.get(f"bench:checksum:{digest}") is None:
+            cache.set_if_absent(f"bench:inflight:{digest}", "1", ex=60)
+    lat, el = timed(dedup, digests)
+    stages["dedup"] = summarize(lat, el)
+    for part in range(0, len(digests), 1000):  # don't leave claims behind in a shared Redis
+        cache.delete(*(f"bench:inflight:{d}" for d in digests[part:part + 1000]))
+
+    ids = [os.path.basename(f).split("_")[0] for f in files]
+    random.Random(1).shuffle(ids)
+    lat, el = timed(directory.get, ids)
+    stages["lookup"] = summarize(lat, el)
+
+    client = MockHiBobClient(latency=args.latency_ms / 1000)
+    lat, el = timed(lambda f: client.upload_payslip("HB000000", f), files, workers=args.workers)
+    stages["upload"] = summarize(lat, el)
+
+    dst = os.path.join(folder, "archive-stage")
+    key = load_key(args.archive_key)
+    lat, el = timed(lambda f: encrypt_copy(f, dst, mode=args.archive_mode, key=key), files)
+    stages["archive"] = summarize(lat, el, nbytes)
+    return stages
+
+def run_bench(args) -> dict:
+    from observibility.logger import logger
+    logger.disable("")  # keep per-file logs out of the measurement; sinks stay as they are
+    try:
+        return _run_bench(args)
+    finally:
+        logger.enable("")
+
+def _run_bench(args) -> dict:
+    with tempfile.TemporaryDirectory(dir=args.workdir) as tmp:
+        folder = os.path.join(tmp, "payslips")
+        os.makedirs(folder)
+        start = time.perf_counter()
+        files = generate_payslips(folder, args.files, args.size_kb * 1024, args.employees, args.seed)
+        directory = EmployeeDirectory(generate_directory(os.path.join(tmp, "employees.ndjson"), args.employees))
+        generated = round(time.perf_counter() - start, 4)
+        nbytes = args.size_kb * 1024 * len(files)
+        report = {
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "archive_key", "workdir")},
+            "generate_seconds": generated,
+            "end_to_end": bench_end_to_end(files, folder, directory, Cache(args.redis_url or None), args, nbytes),
+            "stages": bench_stages(files, tmp, directory, Cache(args.redis_url or None), args, nbytes),
+        }
+    return report
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="End-to-end and per-stage pipeline benchmark (JSON)")
+    ap.add_argument("--files", type=int, default=500)
+    ap.add_argument("--size-kb", type=int, default=64)
+    ap.add_argument("--employees", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--batch-size", type=int, default=500)
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="Simulated HiBob latency per request")
+    ap.add_argument("--archive-mode", default="copy", choices=("copy", "link", "aesgcm"))
+    ap.add_argument("--archive-key", default=os.getenv("ARCHIVE_KEY", ""), help="Hex key for aesgcm")
+    ap.add_argument("--redis-url", default="", help="Benchmark against Redis instead of the in-memory cache")
+    ap.add_argument("--workdir", default=None, help="Where to generate files (default: system temp)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", "-o", default=None, help="Write JSON here instead of stdout")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.archive_mode == "aesgcm" and not args.archive_key:
+        args.archive_key = os.urandom(32).hex()
+    out = json.dumps(run_bench(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+if __name__ == "__main__":
+    main()
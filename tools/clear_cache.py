@@ -5,8 +5,10 @@ from core import config
 """
 Utility script to clear the Redis (or in-memory) cache.
 Used to reset deduplication and rate-limiting state during local testing.
+The local fallback's snapshot (LOCAL_CACHE_SNAPSHOT) is emptied as well.
 """
 
-c = Cache(os.getenv("REDIS_URL", config.REDIS_URL))
+c = Cache(os.getenv("REDIS_URL", config.REDIS_URL), snapshot_path=config.LOCAL_CACHE_SNAPSHOT or None)
 c.flush()
+c.persist()
 print("Cache flushed.")
@@ -0,0 +1,93 @@
+import argparse
+import json
+import random
+import time
+from email import message_from_bytes
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+"""
+Local stand-in for the HiBob payslip API.
+Accepts the same requests as `middleware.hibob_client.HiBobClient` and
+simulates per-request latency and transient failures (503 at `fail_rate`),
+so upload throughput can be measured offline.
+
+Usage:
+  python -m tools.hibob_stub_server --port 8089 --latency-ms 80 --fail-rate 0.1
+  HIBOB_BASE_URL=http://127.0.0.1:8089 python main.py run
+"""
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    msg = message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body, policy=HTTP)
+    fields = {}
+    for part in msg.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = part.get_content() if part.get_filename() is None else part.get_payload(decode=True)
+    return fields
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client pooling is exercised
+    latency = 0.0
+    fail_rate = 0.0
+    item_fail_rate = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            return self._reply(503, {"status": "error", "message": "Simulated failure"})
+        fields = _parse_multipart(self.headers["Content-Type"], body)
+        if self.path == "/payslips":
+            return self._reply(200, self._accept(fields.get("hibob_id")))
+        if self.path == "/payslips/batch":
+            ids = [fields[k] for k in sorted((k for k in fields if k.startswith("hibob_id")),
+                                             key=lambda k: int(k[len("hibob_id"):]))]
+            return self._reply(200, {"status": "ok", "results": [self._accept(h) for h in ids]})
+        self._reply(404, {"status": "error", "message": "not found"})
+
+    def _accept(self, hibob_id) -> dict:
+        if random.random() < self.item_fail_rate:
+            return {"status": "error", "message": "Simulated failure", "hibob_id": hibob_id}
+        return {"status": "ok", "hibob_id": hibob_id}
+
+    def _reply(self, code: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def make_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                fail_rate: float = 0.0, item_fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency": latency_ms / 1000, "fail_rate": fail_rate, "item_fail_rate": item_fail_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve_in_background(**kwargs) -> ThreadingHTTPServer:
+    """Starts a stub server on a daemon thread; `server.server_address` has the bound port."""
+    server = make_server(**kwargs)
+    Thread(target=server.serve_forever, name="hibob-stub", daemon=True).start()
+    return server
+
+def main():
+    ap = argparse.ArgumentParser(description="Local HiBob payslip API stand-in")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="Whole-request 503 rate [0..1]")
+    ap.add_argument("--item-fail-rate", type=float, default=0.0, help="Per-payslip failure rate [0..1]")
+    args = ap.parse_args()
+    server = make_server(args.host, args.port, args.latency_ms, args.fail_rate, args.item_fail_rate)
+    print(f"HiBob stub listening on http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()